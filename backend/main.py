@@ -3,12 +3,18 @@ FastAPI backend server for Agentic Shop Lab web application
 """
 
 import asyncio
+import gzip
+import hashlib
+import json
+import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Optional, Any
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from typing import Dict, List, Optional, Any, Literal, Set
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, HttpUrl
 import sys
 import os
 from dotenv import load_dotenv
@@ -19,7 +25,11 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 # Add parent directory to path to import agentic_shop_lab
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.agentic_shop_lab import AgenticShopLab
+from src.agentic_shop_lab import AgenticShopLab, RuleEngine, CascadeConfig, metrics
+from src.agentic_shop_lab.transport import transport_from_spec
+from src.agentic_shop_lab.loopmonitor import LoopMonitor
+from src.agentic_shop_lab.webhooks import WebhookSender, CallbackURLError
+from src.agentic_shop_lab.checkpoint import CheckpointStore
 
 
 # Pydantic models
@@ -35,9 +45,22 @@ class ProductData(BaseModel):
     rating: Optional[float] = Field(None, ge=0, le=5, description="Average rating")
 
 
-class EvaluationRequest(BaseModel):
+class AgentSelection(BaseModel):
+    """Optional choice of agents and score weights for an evaluation"""
+    agents: Optional[List[str]] = Field(None, description="Agent keys or names to run (default: all enabled)")
+    weights: Optional[Dict[str, float]] = Field(None, description="Score weight per agent key or name")
+
+
+class EvaluationRequest(AgentSelection):
     """Request model for product evaluation"""
     product: ProductData
+    callback_url: Optional[HttpUrl] = Field(None, description="URL that receives the result on completion")
+
+
+class BatchEvaluationRequest(AgentSelection):
+    """Request model for evaluating several products at once"""
+    products: List[ProductData] = Field(..., min_length=1, max_length=100)
+    callback_url: Optional[HttpUrl] = Field(None, description="URL that receives the results on completion")
 
 
 class EvaluationStatus(BaseModel):
@@ -45,6 +68,7 @@ class EvaluationStatus(BaseModel):
     id: str
     status: str  # pending, running, completed, failed, cancelled
     progress: Dict[str, float]
+    partial_results: Dict[str, Dict[str, Any]] = {}
     created_at: str
     completed_at: Optional[str] = None
 
@@ -62,13 +86,33 @@ class EvaluationResult(BaseModel):
     completed_at: str
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Resume checkpointed evaluations on startup; drain running ones on shutdown
+
+    uvicorn runs the shutdown half after it has closed its sockets, so no new
+    submissions arrive while jobs drain.
+    """
+    global draining
+    if loop_monitor is not None:
+        loop_monitor.start()
+    await resume_checkpointed_evaluations()
+    yield
+    draining = True
+    await drain_background_jobs(SHUTDOWN_DRAIN_SECONDS)
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Agentic Shop Lab API",
     description="AI-powered product evaluation API with multi-agent framework",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins for deployment
@@ -83,8 +127,179 @@ app.add_middleware(
 # In-memory storage for evaluations
 evaluations: Dict[str, Dict[str, Any]] = {}
 
+# In-memory storage for batch evaluations, plus a condition per batch that
+# is notified whenever one of its items completes
+batches: Dict[str, Dict[str, Any]] = {}
+batch_updates: Dict[str, asyncio.Condition] = {}
+# Products of one batch evaluated at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+
+# Idempotency-Key -> submission, so retried POSTs map to the original run.
+# Keys are scoped per tenant and endpoint and expire after IDEMPOTENCY_TTL_SECONDS.
+idempotency_keys: Dict[tuple, Dict[str, Any]] = {}
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+
+# Evaluation and batch tasks still running; on shutdown they get
+# SHUTDOWN_DRAIN_SECONDS to finish before they are cancelled
+background_jobs: Set[asyncio.Task] = set()
+# Running evaluation tasks by ID, so cancelling an evaluation stops its agents
+evaluation_tasks: Dict[str, asyncio.Task] = {}
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", 25))
+draining = False
+
+# Optional durable checkpoints of per-agent results, so evaluations cut off
+# by a restart resume with only their unfinished agents
+checkpoint_dir = os.getenv("CHECKPOINT_DIR")
+checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+
+# Completion callbacks, signed with WEBHOOK_SECRET when it is set. Targets are
+# limited to WEBHOOK_ALLOWED_HOSTS, or to public addresses when that is unset.
+webhook_sender = WebhookSender(
+    secret=os.getenv("WEBHOOK_SECRET"),
+    max_attempts=int(os.getenv("WEBHOOK_MAX_ATTEMPTS", 5)),
+    allowed_hosts=os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(","),
+    require_https=os.getenv("WEBHOOK_REQUIRE_HTTPS", "true").lower() in ("1", "true", "yes")
+)
+
+# Optional pipeline instrumentation exposed at /metrics
+if os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes"):
+    metrics.enable(opentelemetry=os.getenv("OTEL_TRACING", "false").lower() in ("1", "true", "yes"))
+
+# Optional deterministic pre-scoring rules (see rules.example.json)
+rules_file = os.getenv("RULES_FILE")
+rule_engine = RuleEngine.from_file(rules_file) if rules_file else None
+
+# Optional cheap-first model cascade, e.g. CASCADE_MODELS=gpt-4o-mini,gpt-4o
+cascade_models = os.getenv("CASCADE_MODELS")
+cascade = CascadeConfig(
+    [m.strip() for m in cascade_models.split(",") if m.strip()],
+    confidence_threshold=int(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", 70))
+) if cascade_models else None
+
+def parse_agent_weights(spec: str) -> Dict[str, float]:
+    """Parse AGENT_WEIGHTS, e.g. "cost=2,safety=3" """
+    weights = {}
+    for entry in spec.split(","):
+        if entry.strip():
+            key, _, weight = entry.partition("=")
+            weights[key.strip()] = float(weight)
+    return weights
+
+
+# Optional agent subset and score weights, e.g. ENABLED_AGENTS=cost,safety
+enabled_agents = os.getenv("ENABLED_AGENTS")
+
 # Initialize framework
-framework = AgenticShopLab()
+framework = AgenticShopLab(
+    rule_engine=rule_engine,
+    mode=os.getenv("EVALUATION_MODE", "fanout"),
+    cascade=cascade,
+    stream=os.getenv("STREAM_COMPLETIONS", "false").lower() in ("1", "true", "yes"),
+    breaker_threshold=int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", 5)),
+    breaker_reset_timeout=float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", 30)),
+    hedge_delay=float(os.getenv("TOOL_HEDGE_DELAY_MS")) / 1000 if os.getenv("TOOL_HEDGE_DELAY_MS") else None,
+    agents=[a.strip() for a in enabled_agents.split(",") if a.strip()] if enabled_agents else None,
+    weights=parse_agent_weights(os.getenv("AGENT_WEIGHTS", ""))
+)
+
+# Optional recorded, replayed or synthetic LLM and tool backends for load tests,
+# e.g. LLM_TRANSPORT=fake or LLM_TRANSPORT=replay:fixtures/session.jsonl
+llm_transport_spec = os.getenv("LLM_TRANSPORT", "live")
+if llm_transport_spec != "live":
+    framework.set_transport(transport_from_spec(
+        llm_transport_spec,
+        live=framework.agents[0].live_transport
+    ))
+
+# Optional event-loop lag monitor that prints the stack of any callback
+# blocking the loop longer than the threshold
+loop_monitor = LoopMonitor(
+    threshold=float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", 100)) / 1000
+) if os.getenv("LOOP_MONITOR", "false").lower() in ("1", "true", "yes") else None
+
+
+def start_background_job(coro) -> asyncio.Task:
+    """Run an evaluation or batch in the background, tracked for draining"""
+    task = asyncio.ensure_future(coro)
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+    return task
+
+
+def start_evaluation_job(evaluation_id: str, *args) -> asyncio.Task:
+    """Run an evaluation in the background, tracked by ID so it can be cancelled"""
+    task = start_background_job(run_evaluation(evaluation_id, *args))
+    evaluation_tasks[evaluation_id] = task
+    task.add_done_callback(lambda _: evaluation_tasks.pop(evaluation_id, None))
+    return task
+
+
+async def drain_background_jobs(timeout: float):
+    """Wait for running jobs, cancelling those still running after timeout"""
+    if not background_jobs:
+        return
+    print(f"Draining {len(background_jobs)} running jobs (up to {timeout:g}s)", file=sys.stderr)
+    _, pending = await asyncio.wait(set(background_jobs), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        print(
+            f"Cancelled {len(pending)} jobs at the drain deadline"
+            + ("; checkpointed evaluations resume on restart" if checkpoints else ""),
+            file=sys.stderr
+        )
+
+
+async def resume_checkpointed_evaluations():
+    """
+    Restore evaluations from their checkpoints
+
+    Evaluations that finished or were cancelled while the previous process
+    drained are restored as they ended; the others rerun their unfinished agents.
+    """
+    if checkpoints is None:
+        return
+    saved = checkpoints.load_all()
+    for record in saved:
+        evaluation_id = record["id"]
+        completed = record.get("agent_results", {})
+        finished = record.get("status") in ("completed", "failed", "cancelled")
+        evaluations[evaluation_id] = {
+            "id": evaluation_id,
+            "status": record["status"] if finished else "pending",
+            "product": record["product"],
+            "tenant": record.get("tenant"),
+            "agents": record["agents"],
+            "weights": record.get("weights"),
+            "progress": {
+                name: 1.0 if finished or name in completed else 0.0
+                for name in record["agents"]
+            },
+            "partial_results": {},
+            "created_at": record["created_at"],
+            "completed_at": record.get("completed_at"),
+            "result": record.get("result"),
+            "error": record.get("error"),
+            "callback": record.get("callback") or (
+                {"url": record["callback_url"], "status": "waiting"} if record.get("callback_url") else None
+            ),
+            "resumed_agents": sorted(completed)
+        }
+        if finished:
+            # Back in memory like any other finished evaluation
+            await checkpoints.remove(evaluation_id)
+            continue
+        start_evaluation_job(
+            evaluation_id,
+            record["product"],
+            record.get("tenant"),
+            record["agents"],
+            record.get("weights"),
+            completed
+        )
+    if saved:
+        print(f"Restored {len(saved)} evaluations from {checkpoint_dir}", file=sys.stderr)
 
 
 @app.get("/")
@@ -98,7 +313,13 @@ async def root():
         "endpoints": {
             "health": "/",
             "agents": "/api/agents",
+            "rules": "/api/rules/stats",
+            "cascade": "/api/cascade/stats",
+            "dependencies": "/api/dependencies",
+            "usage": "/api/usage",
+            "metrics": "/metrics",
             "evaluate": "/api/evaluate",
+            "batch": "/api/evaluate/batch",
             "status": "/api/evaluate/{id}/status",
             "result": "/api/evaluate/{id}/result",
             "cancel": "/api/evaluate/{id}"
@@ -115,23 +336,318 @@ async def get_agents():
     }
 
 
-async def run_evaluation(evaluation_id: str, product_data: Dict[str, Any]):
+@app.get("/api/rules/stats")
+async def get_rule_stats():
+    """Get pre-scoring rule outcomes and the number of LLM calls avoided"""
+    if framework.rule_engine is None:
+        return {"enabled": False}
+    return {"enabled": True, **framework.rule_engine.get_stats()}
+
+
+@app.get("/api/cascade/stats")
+async def get_cascade_stats():
+    """Get model cascade escalation rate, latency and estimated savings"""
+    return {"agents": framework.get_cascade_stats()}
+
+
+@app.get("/api/dependencies")
+async def get_dependencies():
+    """Get circuit breaker state for Tavily and OpenFoodFacts"""
+    return {"dependencies": framework.get_dependency_health()}
+
+
+@app.get("/api/usage")
+async def get_usage(tenant: Optional[str] = None):
+    """Get token, call and estimated cost totals per agent and tenant"""
+    return framework.get_usage(tenant)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Pipeline timing, token and error metrics in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+def find_idempotent_submission(
+    scope: str,
+    key: Optional[str],
+    tenant: Optional[str],
+    request: BaseModel,
+    response: Response
+) -> Optional[str]:
+    """
+    Look up an earlier submission with the same Idempotency-Key
+
+    Returns:
+        The ID of the existing evaluation or batch, or None for a new key
+
+    Raises:
+        HTTPException: 422 if the key was used with a different request body
+    """
+    if not key:
+        return None
+    now = time.monotonic()
+    for stale in [k for k, v in idempotency_keys.items() if now - v["created"] > IDEMPOTENCY_TTL_SECONDS]:
+        del idempotency_keys[stale]
+
+    entry = idempotency_keys.get((scope, tenant, key))
+    if entry is None:
+        return None
+    if entry["fingerprint"] != request_fingerprint(request):
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    response.headers["Idempotent-Replayed"] = "true"
+    return entry["id"]
+
+
+def remember_idempotent_submission(
+    scope: str,
+    key: Optional[str],
+    tenant: Optional[str],
+    request: BaseModel,
+    submission_id: str
+):
+    if key:
+        idempotency_keys[(scope, tenant, key)] = {
+            "id": submission_id,
+            "fingerprint": request_fingerprint(request),
+            "created": time.monotonic()
+        }
+
+
+def request_fingerprint(request: BaseModel) -> str:
+    return hashlib.sha256(
+        json.dumps(request.model_dump(mode="json"), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def resolve_agent_selection(selection: AgentSelection) -> List[str]:
+    """Names of the agents a request selects, rejecting unknown agents with 422"""
+    try:
+        agents = framework.select_agents(selection.agents)
+        framework.selection_weights(agents, selection.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return [agent.name for agent in agents]
+
+
+async def check_callback_url(callback_url: Optional[HttpUrl]):
+    """Reject callback URLs the server may not POST to with 422"""
+    if callback_url is None:
+        return
+    try:
+        await webhook_sender.check_url(str(callback_url))
+    except CallbackURLError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def format_evaluation_result(evaluation_id: str, eval_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Response body of a completed evaluation, also used for callbacks"""
+    result = eval_data.get("result") or {}
+    return {
+        "id": evaluation_id,
+        "status": eval_data["status"],
+        "overall_score": result.get("overall_score", 0),
+        "overall_recommendation": result.get("overall_recommendation", "neutral"),
+        "agent_results": result.get("agent_results", {}),
+        "key_strengths": result.get("key_strengths", []),
+        "key_concerns": result.get("key_concerns", []),
+        "confidence": result.get("confidence", 0),
+        "completed_at": eval_data["completed_at"]
+    }
+
+
+# Raw tool output attached to agent results by BaseAgent.analyze
+TOOL_TRANSCRIPT_FIELDS = ("search_results", "ingredient_data")
+
+# Fields kept by the summary view of an evaluation result
+SUMMARY_FIELDS = (
+    "id", "status", "overall_score", "overall_recommendation",
+    "key_strengths", "key_concerns", "confidence", "completed_at"
+)
+
+
+def compact_agent_result(agent_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Agent result without tool transcripts and per-round usage"""
+    compact = {k: v for k, v in agent_result.items() if k not in TOOL_TRANSCRIPT_FIELDS}
+    if isinstance(compact.get("usage"), dict):
+        compact["usage"] = {k: v for k, v in compact["usage"].items() if k != "rounds"}
+    return compact
+
+
+def project_evaluation_result(
+    body: Dict[str, Any],
+    view: str = "full",
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Reduce a result body to the requested view
+
+    Args:
+        body: Output of format_evaluation_result
+        view: "full" (everything), "compact" (agent results without tool
+            transcripts) or "summary" (overall fields only)
+        fields: Optional comma-separated top-level fields to keep; "id" is
+            always included
+    """
+    if view == "summary":
+        body = {k: body[k] for k in SUMMARY_FIELDS if k in body}
+    elif view == "compact":
+        body = {
+            **body,
+            "agent_results": {
+                name: compact_agent_result(r) if isinstance(r, dict) else r
+                for name, r in body.get("agent_results", {}).items()
+            }
+        }
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()} | {"id"}
+        body = {k: v for k, v in body.items() if k in wanted}
+    return body
+
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+
+
+def _brotli():
+    """The brotli module when installed, otherwise None (gzip only)"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
+
+
+def polled_json_response(request: Request, body: Dict[str, Any]) -> Response:
+    """
+    JSON response with an ETag, compressed when the client accepts it
+
+    Repeated polls sending the ETag back in If-None-Match get 304 Not Modified
+    while the body is unchanged. Bodies are compressed with brotli (when the
+    brotli package is installed) or gzip, according to Accept-Encoding.
+    """
+    content = json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+    etag = 'W/"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if len(content) >= COMPRESSION_MIN_BYTES:
+        accepted = {
+            e.split(";")[0].strip().lower()
+            for e in request.headers.get("accept-encoding", "").split(",")
+        }
+        brotli = _brotli() if "br" in accepted else None
+        if brotli is not None:
+            content = brotli.compress(content, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            content = gzip.compress(content, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+async def send_evaluation_callback(evaluation_id: str):
+    """POST the finished evaluation to its callback URL"""
+    eval_data = evaluations[evaluation_id]
+    if eval_data["status"] == "completed":
+        payload = {"event": "evaluation.completed", **format_evaluation_result(evaluation_id, eval_data)}
+    else:
+        payload = {
+            "event": f"evaluation.{eval_data['status']}",
+            "id": evaluation_id,
+            "status": eval_data["status"],
+            "error": eval_data.get("error"),
+            "completed_at": eval_data.get("completed_at")
+        }
+    await webhook_sender.deliver(
+        eval_data["callback"]["url"],
+        evaluation_id,
+        payload,
+        eval_data["callback"]
+    )
+
+
+async def run_evaluation(
+    evaluation_id: str,
+    product_data: Dict[str, Any],
+    tenant: Optional[str] = None,
+    agents: Optional[List[str]] = None,
+    weights: Optional[Dict[str, float]] = None,
+    completed_results: Optional[Dict[str, Dict[str, Any]]] = None
+):
     """Background task to run product evaluation"""
+    record = evaluations[evaluation_id]
+    completed_results = dict(completed_results or {})
+    checkpoint = {
+        "id": evaluation_id,
+        "product": product_data,
+        "tenant": tenant,
+        "agents": record["agents"],
+        "weights": weights,
+        "callback_url": (record.get("callback") or {}).get("url"),
+        "created_at": record["created_at"],
+        "agent_results": completed_results
+    }
     try:
         # Update status to running
-        evaluations[evaluation_id]["status"] = "running"
-        evaluations[evaluation_id]["progress"] = {
-            agent.name: 0.0 for agent in framework.agents
+        record["status"] = "running"
+        record["progress"] = {
+            name: 1.0 if name in completed_results else 0.0 for name in record["agents"]
         }
         
+        # Checkpoint each finished agent so a restart only reruns the others
+        async def result_callback(agent_name: str, result: Dict[str, Any]):
+            if checkpoints is None or record["status"] != "running":
+                return
+            if result.get("recommendation") == "error":
+                return
+            completed_results[agent_name] = result
+            try:
+                await checkpoints.save(evaluation_id, checkpoint)
+            except OSError as e:
+                print(f"Checkpoint of {evaluation_id} failed: {e}", file=sys.stderr)
+        
+        if checkpoints is not None:
+            await checkpoints.save(evaluation_id, checkpoint)
+        
         # Progress callback
         async def progress_callback(progress: Dict[str, float]):
             evaluations[evaluation_id]["progress"] = progress
         
+        # Early result fields (score, recommendation, ...) as they stream in
+        async def field_callback(agent_name: str, field: str, value: Any):
+            partial = evaluations[evaluation_id]["partial_results"]
+            partial.setdefault(agent_name, {})[field] = value
+        
         # Run evaluation
         result = await framework.evaluate_product(
             product_data,
-            progress_callback
+            progress_callback,
+            field_callback=field_callback,
+            tenant=tenant,
+            agents=agents,
+            weights=weights,
+            completed_results=completed_results,
+            result_callback=result_callback
         )
         
         # Update with results
@@ -147,11 +663,26 @@ async def run_evaluation(evaluation_id: str, product_data: Dict[str, Any]):
             "error": str(e),
             "completed_at": datetime.now().isoformat()
         })
+    
+    if evaluations[evaluation_id].get("callback"):
+        await send_evaluation_callback(evaluation_id)
+    
+    # Finished either way, so there is nothing left to run. Results finished
+    # while draining are kept so the next process can still serve them; tasks
+    # cancelled at the drain deadline never get here and resume instead.
+    if checkpoints is not None:
+        if draining:
+            await checkpoints.save(evaluation_id, {
+                **checkpoint,
+                **{key: record.get(key) for key in ("status", "result", "error", "completed_at", "callback")}
+            })
+        else:
+            await checkpoints.remove(evaluation_id)
 
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request as FastAPIRequest
+from fastapi import Request as FastAPIRequest
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: FastAPIRequest, exc: RequestValidationError):
@@ -165,34 +696,58 @@ async def validation_exception_handler(request: FastAPIRequest, exc: RequestVali
 @app.post("/api/evaluate")
 async def create_evaluation(
     request: EvaluationRequest,
-    background_tasks: BackgroundTasks
+    response: Response,
+    tenant: Optional[str] = Header(None, alias="X-Tenant-ID"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Start a new product evaluation
     
     Creates an evaluation task and returns the evaluation ID
-    for tracking progress.
+    for tracking progress. Retries sending the same Idempotency-Key
+    get the original evaluation instead of starting a new one.
     """
+    agent_names = resolve_agent_selection(request)
+    await check_callback_url(request.callback_url)
+    
+    # No awaits from the lookup until the key is remembered, so concurrent
+    # retries can't each miss the entry and start their own evaluation
+    existing_id = find_idempotent_submission("evaluate", idempotency_key, tenant, request, response)
+    if existing_id is not None and existing_id in evaluations:
+        return {
+            "id": existing_id,
+            "status": evaluations[existing_id]["status"],
+            "message": "Evaluation already submitted"
+        }
+    
     # Generate unique ID
     evaluation_id = str(uuid.uuid4())
+    remember_idempotent_submission("evaluate", idempotency_key, tenant, request, evaluation_id)
     
     # Initialize evaluation record
     evaluations[evaluation_id] = {
         "id": evaluation_id,
         "status": "pending",
         "product": request.product.model_dump(),
-        "progress": {agent.name: 0.0 for agent in framework.agents},
+        "tenant": tenant,
+        "agents": agent_names,
+        "weights": request.weights,
+        "progress": {name: 0.0 for name in agent_names},
+        "partial_results": {},
         "created_at": datetime.now().isoformat(),
         "completed_at": None,
         "result": None,
-        "error": None
+        "error": None,
+        "callback": {"url": str(request.callback_url), "status": "waiting"} if request.callback_url else None
     }
     
     # Start evaluation in background
-    background_tasks.add_task(
-        run_evaluation,
+    start_evaluation_job(
         evaluation_id,
-        request.product.model_dump()
+        request.product.model_dump(),
+        tenant,
+        request.agents,
+        request.weights
     )
     
     return {
@@ -203,32 +758,42 @@ async def create_evaluation(
 
 
 @app.get("/api/evaluate/{evaluation_id}/status")
-async def get_evaluation_status(evaluation_id: str):
+async def get_evaluation_status(evaluation_id: str, request: Request):
     """
     Get the current status of an evaluation
     
-    Returns progress information for all agents.
+    Returns progress information for all agents. Supports If-None-Match, so
+    polls of an unchanged status return 304.
     """
     if evaluation_id not in evaluations:
         raise HTTPException(status_code=404, detail="Evaluation not found")
     
     eval_data = evaluations[evaluation_id]
     
-    return {
+    return polled_json_response(request, {
         "id": evaluation_id,
         "status": eval_data["status"],
         "progress": eval_data["progress"],
+        "partial_results": eval_data.get("partial_results", {}),
         "created_at": eval_data["created_at"],
-        "completed_at": eval_data.get("completed_at")
-    }
+        "completed_at": eval_data.get("completed_at"),
+        "callback": eval_data.get("callback")
+    })
 
 
 @app.get("/api/evaluate/{evaluation_id}/result")
-async def get_evaluation_result(evaluation_id: str):
+async def get_evaluation_result(
+    evaluation_id: str,
+    request: Request,
+    view: Literal["full", "compact", "summary"] = "full",
+    fields: Optional[str] = None
+):
     """
     Get the results of a completed evaluation
     
-    Returns detailed evaluation results from all agents.
+    Returns detailed evaluation results from all agents. view=compact drops
+    the raw tool transcripts, view=summary drops agent_results entirely, and
+    fields=a,b keeps only the listed top-level fields.
     """
     if evaluation_id not in evaluations:
         raise HTTPException(status_code=404, detail="Evaluation not found")
@@ -253,19 +818,8 @@ async def get_evaluation_result(evaluation_id: str):
             detail="Evaluation was cancelled"
         )
     
-    result = eval_data.get("result", {})
-    
-    return {
-        "id": evaluation_id,
-        "status": eval_data["status"],
-        "overall_score": result.get("overall_score", 0),
-        "overall_recommendation": result.get("overall_recommendation", "neutral"),
-        "agent_results": result.get("agent_results", {}),
-        "key_strengths": result.get("key_strengths", []),
-        "key_concerns": result.get("key_concerns", []),
-        "confidence": result.get("confidence", 0),
-        "completed_at": eval_data["completed_at"]
-    }
+    body = project_evaluation_result(format_evaluation_result(evaluation_id, eval_data), view, fields)
+    return polled_json_response(request, body)
 
 
 @app.delete("/api/evaluate/{evaluation_id}")
@@ -273,7 +827,8 @@ async def cancel_evaluation(evaluation_id: str):
     """
     Cancel a running evaluation
     
-    Marks the evaluation as cancelled.
+    Marks the evaluation as cancelled, stops its agents and drops its
+    checkpoint so a restart doesn't resume it.
     """
     if evaluation_id not in evaluations:
         raise HTTPException(status_code=404, detail="Evaluation not found")
@@ -289,6 +844,12 @@ async def cancel_evaluation(evaluation_id: str):
     evaluations[evaluation_id]["status"] = "cancelled"
     evaluations[evaluation_id]["completed_at"] = datetime.now().isoformat()
     
+    task = evaluation_tasks.pop(evaluation_id, None)
+    if task is not None:
+        task.cancel()
+    if checkpoints is not None:
+        await checkpoints.remove(evaluation_id)
+    
     return {
         "id": evaluation_id,
         "status": "cancelled",
@@ -296,6 +857,213 @@ async def cancel_evaluation(evaluation_id: str):
     }
 
 
+async def run_batch_evaluation(
+    batch_id: str,
+    products: List[Dict[str, Any]],
+    tenant: Optional[str] = None,
+    agents: Optional[List[str]] = None,
+    weights: Optional[Dict[str, float]] = None
+):
+    """Background task to run a batch evaluation"""
+    batch = batches[batch_id]
+    condition = batch_updates[batch_id]
+    batch["status"] = "running"
+    
+    async def progress_callback(index: int, progress: Dict[str, float]):
+        item = batch["items"][index]
+        item["status"] = "running"
+        item["progress"] = sum(progress.values()) / max(len(progress), 1)
+        batch["progress"] = sum(i["progress"] for i in batch["items"]) / len(batch["items"])
+    
+    async def item_callback(index: int, result: Dict[str, Any]):
+        item = batch["items"][index]
+        item["progress"] = 1.0
+        item["completed_at"] = datetime.now().isoformat()
+        if "error" in result:
+            item.update({"status": "failed", "error": result["error"]})
+        else:
+            item.update({"status": "completed", "result": result})
+        batch["completed_order"].append(index)
+        batch["progress"] = sum(i["progress"] for i in batch["items"]) / len(batch["items"])
+        async with condition:
+            condition.notify_all()
+    
+    try:
+        await framework.evaluate_batch(
+            products, item_callback, progress_callback,
+            tenant=tenant, agents=agents, weights=weights,
+            concurrency=BATCH_CONCURRENCY
+        )
+        batch["status"] = "completed"
+    except Exception as e:
+        batch.update({"status": "failed", "error": str(e)})
+    
+    batch["completed_at"] = datetime.now().isoformat()
+    async with condition:
+        condition.notify_all()
+    
+    if batch.get("callback"):
+        await webhook_sender.deliver(
+            batch["callback"]["url"],
+            batch_id,
+            {
+                "event": f"batch.{batch['status']}",
+                "id": batch_id,
+                "status": batch["status"],
+                "error": batch.get("error"),
+                "items": [summarize_batch_item(item) for item in batch["items"]],
+                "completed_at": batch["completed_at"]
+            },
+            batch["callback"]
+        )
+
+
+def summarize_batch_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact per-item view used in batch status and stream responses"""
+    summary = {
+        "index": item["index"],
+        "name": item["name"],
+        "status": item["status"],
+        "progress": item["progress"],
+    }
+    if item.get("result"):
+        summary["overall_score"] = item["result"].get("overall_score", 0)
+        summary["overall_recommendation"] = item["result"].get("overall_recommendation", "neutral")
+    if item.get("error"):
+        summary["error"] = item["error"]
+    return summary
+
+
+@app.post("/api/evaluate/batch")
+async def create_batch_evaluation(
+    request: BatchEvaluationRequest,
+    response: Response,
+    tenant: Optional[str] = Header(None, alias="X-Tenant-ID"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Start a batch evaluation of several products
+    
+    Work common to the batch is shared: Supplier Trust runs once per
+    distinct brand, Cost Analysis searches prices once per category and
+    other identical web searches run once. At most BATCH_CONCURRENCY products
+    are evaluated at once.
+    """
+    agent_names = resolve_agent_selection(request)
+    await check_callback_url(request.callback_url)
+    
+    # Looked up and remembered without an await in between, as in create_evaluation
+    existing_id = find_idempotent_submission("batch", idempotency_key, tenant, request, response)
+    if existing_id is not None and existing_id in batches:
+        return {
+            "id": existing_id,
+            "status": batches[existing_id]["status"],
+            "count": len(batches[existing_id]["items"]),
+            "message": "Batch evaluation already submitted"
+        }
+    
+    batch_id = str(uuid.uuid4())
+    remember_idempotent_submission("batch", idempotency_key, tenant, request, batch_id)
+    products = [product.model_dump() for product in request.products]
+    
+    batches[batch_id] = {
+        "id": batch_id,
+        "status": "pending",
+        "tenant": tenant,
+        "agents": agent_names,
+        "weights": request.weights,
+        "progress": 0.0,
+        "items": [
+            {"index": i, "name": p["name"], "status": "pending", "progress": 0.0, "result": None}
+            for i, p in enumerate(products)
+        ],
+        "completed_order": [],
+        "created_at": datetime.now().isoformat(),
+        "completed_at": None,
+        "callback": {"url": str(request.callback_url), "status": "waiting"} if request.callback_url else None,
+    }
+    batch_updates[batch_id] = asyncio.Condition()
+    
+    start_background_job(
+        run_batch_evaluation(batch_id, products, tenant, request.agents, request.weights)
+    )
+    
+    return {
+        "id": batch_id,
+        "status": "pending",
+        "count": len(products),
+        "message": "Batch evaluation started successfully"
+    }
+
+
+@app.get("/api/evaluate/batch/{batch_id}")
+async def get_batch_status(batch_id: str, request: Request):
+    """
+    Get aggregate progress and per-item status of a batch evaluation
+    """
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    batch = batches[batch_id]
+    
+    return polled_json_response(request, {
+        "id": batch_id,
+        "status": batch["status"],
+        "progress": batch["progress"],
+        "completed": len(batch["completed_order"]),
+        "count": len(batch["items"]),
+        "items": [summarize_batch_item(item) for item in batch["items"]],
+        "created_at": batch["created_at"],
+        "completed_at": batch["completed_at"],
+        "callback": batch.get("callback")
+    })
+
+
+@app.get("/api/evaluate/batch/{batch_id}/stream")
+async def stream_batch_results(batch_id: str):
+    """
+    Stream per-item results of a batch as newline-delimited JSON
+    
+    Items already finished are sent immediately, the rest as they complete.
+    The last line is a summary with "type": "batch".
+    """
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    batch = batches[batch_id]
+    condition = batch_updates[batch_id]
+    
+    async def event_stream():
+        sent = 0
+        while True:
+            async with condition:
+                while sent == len(batch["completed_order"]) and batch["status"] in ("pending", "running"):
+                    await condition.wait()
+                pending = batch["completed_order"][sent:]
+                finished = batch["status"] not in ("pending", "running")
+            
+            for index in pending:
+                item = batch["items"][index]
+                yield json.dumps({
+                    "type": "item",
+                    **summarize_batch_item(item),
+                    "result": item.get("result")
+                }) + "\n"
+            sent += len(pending)
+            
+            if finished and sent == len(batch["completed_order"]):
+                yield json.dumps({
+                    "type": "batch",
+                    "id": batch_id,
+                    "status": batch["status"],
+                    "count": len(batch["items"]),
+                    "completed_at": batch["completed_at"]
+                }) + "\n"
+                return
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,135 @@
+"""
+Benchmark: fused single-call mode vs. per-agent fan-out mode
+
+Runs each sample product through both execution modes and compares wall-clock
+latency, token usage and agreement between the per-agent results. Token counts
+come from each evaluation's usage summary.
+
+Usage:
+    OPENAI_API_KEY=... python benchmarks/fused_vs_fanout.py [products.jsonl] [--runs N]
+    python benchmarks/fused_vs_fanout.py --transport fake
+    python benchmarks/fused_vs_fanout.py --transport replay:fixtures/session.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.agentic_shop_lab import AgenticShopLab
+from src.agentic_shop_lab.transport import transport_from_spec
+
+
+SAMPLE_PRODUCTS = [
+    {
+        "name": "Organic Peanut Butter",
+        "price": 7.99,
+        "brand": "Smucker's",
+        "category": "Food",
+        "description": "Creamy organic peanut butter, 16 oz jar",
+        "ingredients": "Organic peanuts, salt",
+        "reviews": "Great taste, natural oil separation",
+        "rating": 4.6
+    },
+    {
+        "name": "Energy Drink Variety Pack",
+        "price": 29.99,
+        "brand": "Monster",
+        "category": "Beverages",
+        "description": "24 cans of assorted energy drinks",
+        "ingredients": "Carbonated water, sugar, glucose, citric acid, taurine, caffeine, sucralose",
+        "reviews": "Good value for the pack size, very sweet",
+        "rating": 4.2
+    },
+]
+
+
+async def run_mode(
+    framework: AgenticShopLab,
+    product: Dict[str, Any],
+    mode: str
+) -> Dict[str, Any]:
+    """Evaluate one product in one mode and collect measurements"""
+    start = time.perf_counter()
+    result = await framework.evaluate_product(product, mode=mode)
+    usage = result["usage"]
+    return {
+        "latency": time.perf_counter() - start,
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "calls": usage["llm_calls"],
+        "result": result,
+    }
+
+
+def agreement(fanout: Dict[str, Any], fused: Dict[str, Any]) -> Dict[str, float]:
+    """Compare per-agent recommendations and scores between two evaluations"""
+    matches = 0
+    score_diffs = []
+    for name, a in fanout["agent_results"].items():
+        b = fused["agent_results"].get(name, {})
+        if a.get("recommendation") == b.get("recommendation"):
+            matches += 1
+        score_diffs.append(abs(a.get("score", 0) - b.get("score", 0)))
+    return {
+        "recommendation_match": matches / max(len(score_diffs), 1),
+        "mean_score_diff": statistics.mean(score_diffs) if score_diffs else 0.0,
+        "overall_match": float(fanout["overall_recommendation"] == fused["overall_recommendation"]),
+    }
+
+
+def summarize(label: str, runs: List[Dict[str, Any]]):
+    latencies = [r["latency"] for r in runs]
+    print(f"{label:>8}: latency mean {statistics.mean(latencies):.2f}s "
+          f"(min {min(latencies):.2f}s, max {max(latencies):.2f}s), "
+          f"prompt tokens {statistics.mean(r['prompt_tokens'] for r in runs):.0f}, "
+          f"completion tokens {statistics.mean(r['completion_tokens'] for r in runs):.0f}, "
+          f"calls {statistics.mean(r['calls'] for r in runs):.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("products", nargs="?", help="JSONL file of products (defaults to built-in samples)")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per product and mode")
+    parser.add_argument("--transport", default="live",
+                        help="live, fake, record:<path> or replay:<path>")
+    args = parser.parse_args()
+
+    if args.products:
+        with open(args.products, "r", encoding="utf-8") as f:
+            products = [json.loads(line) for line in f if line.strip()]
+    else:
+        products = SAMPLE_PRODUCTS
+
+    framework = AgenticShopLab()
+    if args.transport != "live":
+        framework.set_transport(transport_from_spec(
+            args.transport, live=framework.agents[0].live_transport
+        ))
+
+    fanout_runs, fused_runs, agreements = [], [], []
+    for product in products:
+        for _ in range(args.runs):
+            fanout = await run_mode(framework, product, "fanout")
+            fused = await run_mode(framework, product, "fused")
+            fanout_runs.append(fanout)
+            fused_runs.append(fused)
+            agreements.append(agreement(fanout["result"], fused["result"]))
+
+    print(f"Products: {len(products)}, runs per mode: {len(fanout_runs)}")
+    summarize("fanout", fanout_runs)
+    summarize("fused", fused_runs)
+    print(f"Agreement: per-agent recommendation "
+          f"{statistics.mean(a['recommendation_match'] for a in agreements):.0%}, "
+          f"overall recommendation {statistics.mean(a['overall_match'] for a in agreements):.0%}, "
+          f"mean score difference {statistics.mean(a['mean_score_diff'] for a in agreements):.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
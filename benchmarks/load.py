@@ -0,0 +1,282 @@
+"""
+Benchmark: evaluation throughput, latency percentiles and event-loop lag
+
+Drives AgenticShopLab (or the FastAPI app) with a fixed number of concurrent
+evaluations and reports evaluations per second, p50/p95/p99 latency and how
+late the event loop ran a 10 ms heartbeat while under load.
+
+LLM and tool calls go through a transport: a synthetic fake backend by default,
+a replayed fixture file, or live services while recording a fixture.
+
+Usage:
+    python benchmarks/load.py --requests 200 --concurrency 16
+    python benchmarks/load.py --target api --llm-latency 1.2 --error-rate 0.02
+    OPENAI_API_KEY=... TAVILY_API_KEY=... python benchmarks/load.py \\
+        --transport record:fixtures/session.jsonl --requests 10
+    python benchmarks/load.py --transport replay:fixtures/session.jsonl
+    python benchmarks/load.py --target api --url http://localhost:8000
+    python benchmarks/load.py --strict-blocking   # exit 1 on a blocking agent call
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+
+from src.agentic_shop_lab import AgenticShopLab
+from src.agentic_shop_lab.transport import FakeTransport, transport_from_spec
+from src.agentic_shop_lab.loopmonitor import LoopMonitor, PACKAGE_PATH
+
+
+SAMPLE_PRODUCTS = [
+    {
+        "name": "Organic Peanut Butter",
+        "price": 7.99,
+        "brand": "Smucker's",
+        "category": "Food",
+        "description": "Creamy organic peanut butter, 16 oz jar",
+        "ingredients": "Organic peanuts, salt",
+        "rating": 4.6
+    },
+    {
+        "name": "Vitamin C Serum",
+        "price": 24.99,
+        "brand": "CeraVe",
+        "category": "Skincare",
+        "description": "Brightening serum with 10% vitamin C",
+        "ingredients": "L-Ascorbic Acid, Hyaluronic Acid, Vitamin E",
+        "rating": 4.4
+    },
+    {
+        "name": "Energy Drink Variety Pack",
+        "price": 29.99,
+        "brand": "Monster",
+        "category": "Beverages",
+        "description": "24 cans of assorted energy drinks",
+        "ingredients": "Carbonated water, sugar, glucose, citric acid, taurine, caffeine",
+        "rating": 4.2
+    },
+]
+
+
+class LoopLagProbe:
+    """Measures how late the event loop wakes a periodic heartbeat"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def build_transport(args):
+    if args.transport == "fake":
+        return FakeTransport(
+            llm_latency=args.llm_latency,
+            tool_latency=args.tool_latency,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            tool_error_rate=args.error_rate,
+            tool_call_rate=args.tool_call_rate,
+            seed=args.seed
+        )
+    return None
+
+
+def configure(framework: AgenticShopLab, args):
+    transport = build_transport(args) or transport_from_spec(
+        args.transport, live=framework.agents[0].live_transport
+    )
+    if transport is not None:
+        framework.set_transport(transport)
+
+
+async def evaluate_framework(framework: AgenticShopLab, product: Dict[str, Any]) -> bool:
+    result = await framework.evaluate_product(product)
+    return all(r.get("recommendation") != "error" for r in result["agent_results"].values())
+
+
+async def evaluate_api(client, product: Dict[str, Any], poll_interval: float) -> bool:
+    response = await client.post("/api/evaluate", json={"product": product})
+    response.raise_for_status()
+    evaluation_id = response.json()["id"]
+    while True:
+        status = (await client.get(f"/api/evaluate/{evaluation_id}/status")).json()
+        if status["status"] in ("failed", "cancelled"):
+            return False
+        if status["status"] == "completed":
+            result = (await client.get(f"/api/evaluate/{evaluation_id}/result")).json()
+            return all(r.get("recommendation") != "error" for r in result["agent_results"].values())
+        await asyncio.sleep(poll_interval)
+
+
+async def run(args) -> Dict[str, Any]:
+    products = SAMPLE_PRODUCTS
+    if args.products:
+        with open(args.products, "r", encoding="utf-8") as f:
+            products = [json.loads(line) for line in f if line.strip()]
+
+    client = None
+    if args.target == "api":
+        import httpx
+
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=120)
+        else:
+            sys.path.insert(0, os.path.join(ROOT, "backend"))
+            import main as backend
+
+            configure(backend.framework, args)
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=backend.app),
+                base_url="http://benchmark"
+            )
+
+        async def evaluate(product):
+            return await evaluate_api(client, product, args.poll_interval)
+    else:
+        framework = AgenticShopLab(mode=args.mode)
+        configure(framework, args)
+
+        async def evaluate(product):
+            return await evaluate_framework(framework, product)
+
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ok = await evaluate(products[index % len(products)])
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                failures += 1
+
+    probe = LoopLagProbe()
+    probe.start()
+    monitor = LoopMonitor(threshold=args.block_threshold / 1000, on_block=None)
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await probe.stop()
+    await monitor.stop()
+    if client is not None:
+        await client.aclose()
+
+    return {
+        "target": args.target,
+        "transport": args.transport,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "evaluations_per_second": args.requests / elapsed if elapsed else 0.0,
+        "failures": failures,
+        "latency_seconds": {
+            "mean": statistics.mean(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+        "loop_lag_seconds": {
+            "p50": percentile(probe.samples, 50),
+            "p99": percentile(probe.samples, 99),
+            "max": max(probe.samples, default=0.0),
+        },
+        # Only stretches where the loop was stuck inside this package count
+        "blocking_calls": [
+            report.format() for report in monitor.blocking_reports(PACKAGE_PATH)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("products", nargs="?", help="JSONL file of products (defaults to built-in samples)")
+    parser.add_argument("--target", choices=("framework", "api"), default="framework",
+                        help="Benchmark AgenticShopLab directly or through the FastAPI app")
+    parser.add_argument("--url", help="Benchmark a running API server instead of the in-process app")
+    parser.add_argument("--transport", default="fake",
+                        help="fake, live, record:<path> or replay:<path>")
+    parser.add_argument("--mode", default="fanout", help="Execution mode for the framework target")
+    parser.add_argument("--requests", type=int, default=100, help="Total evaluations")
+    parser.add_argument("--concurrency", type=int, default=8, help="Evaluations in flight")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Fake median completion latency (s)")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="Fake median tool latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Fake log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake per-call failure probability")
+    parser.add_argument("--tool-call-rate", type=float, default=0.3,
+                        help="Fake probability that a first completion calls a tool")
+    parser.add_argument("--seed", type=int, default=1, help="Fake backend random seed")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="API status poll interval (s)")
+    parser.add_argument("--block-threshold", type=float, default=50,
+                        help="Report callbacks blocking the event loop longer than this (ms)")
+    parser.add_argument("--strict-blocking", action="store_true",
+                        help="Exit with status 1 if a blocking call is found in the agent path")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    blocking = report["blocking_calls"]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        if args.strict_blocking and blocking:
+            sys.exit(1)
+        return
+
+    latency = report["latency_seconds"]
+    lag = report["loop_lag_seconds"]
+    print(f"{report['requests']} evaluations against {report['target']} "
+          f"({report['transport']} transport, concurrency {report['concurrency']}) "
+          f"in {report['seconds']:.2f}s")
+    print(f"Throughput: {report['evaluations_per_second']:.2f} evaluations/s, "
+          f"{report['failures']} with failures")
+    print(f"Latency: mean {latency['mean']:.3f}s, p50 {latency['p50']:.3f}s, "
+          f"p95 {latency['p95']:.3f}s, p99 {latency['p99']:.3f}s")
+    print(f"Event-loop lag: p50 {lag['p50'] * 1000:.1f}ms, p99 {lag['p99'] * 1000:.1f}ms, "
+          f"max {lag['max'] * 1000:.1f}ms")
+    print(f"Blocking calls in the agent path: {len(blocking)}")
+    for stack in blocking:
+        print(stack, file=sys.stderr)
+    if args.strict_blocking and blocking:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: backend cold-start time with an import-time budget
+
+Starts fresh interpreters that import backend/main.py and answer one health
+check through the ASGI app, then reports the median import time and time to
+first response. The run fails (exit status 1) when the median import time
+exceeds the budget or when a module that should load lazily was imported at
+startup.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# SDKs that must only be imported on the first agent call
+LAZY_MODULES = ("openai", "tavily", "requests")
+
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_response():
+    scope = {"type": "http", "method": "GET", "path": "/", "raw_path": b"/",
+             "query_string": b"", "headers": [], "http_version": "1.1",
+             "scheme": "http", "server": ("probe", 80), "client": ("probe", 1)}
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        sent.append(message)
+    await main.app(scope, receive, send)
+    return sent[0]["status"]
+
+status = asyncio.run(first_response())
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_response_seconds": time.perf_counter() - start,
+    "status": status,
+    "modules": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="Maximum median import time of backend/main.py (ms)")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_seconds"] for r in runs) * 1000
+    first_ms = statistics.median(r["first_response_seconds"] for r in runs) * 1000
+    eager = sorted({name for r in runs for name in r["modules"]})
+
+    print(f"Cold start over {args.runs} runs: import {import_ms:.0f}ms, "
+          f"first health check {first_ms:.0f}ms (median)")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import time {import_ms:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+    if any(r["status"] != 200 for r in runs):
+        failures.append("health check did not return 200")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,7 @@ export interface EvaluationStatus {
   id: string;
   status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
   progress: Record<string, number>;
+  partial_results?: Record<string, Partial<AgentResult>>;
   created_at: string;
   completed_at?: string;
 }
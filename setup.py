@@ -16,6 +16,11 @@ setup(
         "openai>=1.0.0",
         "asyncio",
     ],
+    entry_points={
+        "console_scripts": [
+            "shoplab-catalog=agentic_shop_lab.catalog:main",
+        ],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
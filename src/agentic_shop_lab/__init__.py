@@ -2,20 +2,43 @@
 Agentic Shop Lab - AI-powered product evaluation framework
 """
 
-from .framework import AgenticShopLab
-from .agents import (
-    CostAnalysisAgent,
-    SupplierTrustAgent,
-    SustainabilityAgent,
-    IngredientSafetyAgent
-)
+import importlib
 
 __version__ = "1.0.0"
 
+# Public names and the submodules defining them. Submodules are imported on
+# first attribute access (PEP 562) so importing the package stays cheap.
+_LAZY_ATTRIBUTES = {
+    "AgenticShopLab": ".framework",
+    "CostAnalysisAgent": ".agents",
+    "SupplierTrustAgent": ".agents",
+    "SustainabilityAgent": ".agents",
+    "IngredientSafetyAgent": ".agents",
+    "RuleEngine": ".rules",
+    "CascadeConfig": ".cascade",
+}
+
 __all__ = [
     "AgenticShopLab",
     "CostAnalysisAgent",
     "SupplierTrustAgent",
     "SustainabilityAgent",
     "IngredientSafetyAgent",
+    "RuleEngine",
+    "CascadeConfig",
+    "metrics",
 ]
+
+
+def __getattr__(name):
+    if name == "metrics":
+        return importlib.import_module(".metrics", __name__)
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -4,10 +4,97 @@ Specialized AI agents for product evaluation
 
 import asyncio
 import json
-from typing import Dict, Any, Optional, Callable
-from openai import AsyncOpenAI
-import os
-from tavily import TavilyClient
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable, Tuple, Type
+from types import SimpleNamespace
+from . import metrics
+from .cascade import CascadeConfig, CascadeStats
+from .streaming import IncrementalJSONParser, StreamProgress
+from .usage import new_usage, record_round, merge_usage
+from .transport import Transport, LiveTransport, TransportError
+from .resilience import CircuitBreaker, guarded_call
+
+
+# Static parts of every agent request. They are built once and sent in the same
+# order (tools, system prompt, output contract) so the request prefix stays
+# byte-identical across calls and provider-side prompt caching can apply.
+OUTPUT_CONTRACT = "IMPORTANT: Respond in valid JSON format with keys: score (0-100), recommendation (buy/neutral/avoid), reasoning (string), confidence (0-100). If you need to search the web or look up ingredients, use the available function tools."
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "web_search",
+            "description": "Search the web for current market prices, competitor information, and general product data",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query to look for current information"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup_product_ingredients",
+            "description": "Look up product ingredients using the OpenFoodFacts database",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "product_name": {
+                        "type": "string",
+                        "description": "The product name to search for ingredients"
+                    },
+                    "category": {
+                        "type": "string",
+                        "description": "The product category to help narrow the search"
+                    }
+                },
+                "required": ["product_name"]
+            }
+        }
+    }
+]
+
+
+# External dependency behind each tool, used to look up its circuit breaker
+TOOL_DEPENDENCIES = {
+    "web_search": "tavily",
+    "lookup_product_ingredients": "openfoodfacts",
+}
+
+
+# For evaluations made without a tool round trip (fused and offline); agents
+# such as Ingredient Safety are otherwise told to look up missing data with a tool
+NO_TOOLS_NOTE = (
+    "No tools are available for this evaluation. Do not request web searches "
+    "or ingredient lookups; evaluate from the product data and lower your "
+    "confidence where information is missing."
+)
+
+# Per-batch cache of in-flight web searches keyed by normalized query. Set by
+# AgenticShopLab.evaluate_batch so products in one batch share identical lookups.
+search_cache: ContextVar[Optional[Dict[str, "asyncio.Future[str]"]]] = ContextVar(
+    "search_cache", default=None
+)
+
+
+def error_result(reasoning: str) -> Dict[str, Any]:
+    """Result recorded for an agent that could not produce an evaluation"""
+    return {
+        "score": 0,
+        "recommendation": "error",
+        "reasoning": reasoning,
+        "confidence": 0,
+        "details": {},
+        "source": "llm"
+    }
 
 
 class BaseAgent:
@@ -17,14 +104,68 @@ class BaseAgent:
         self.name = name
         self.emoji = emoji
         self.description = description
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.key: Optional[str] = None  # Registry key, set by AgenticShopLab
         self.model = "gpt-4o"  # Using GPT-4o for reliable responses (GPT-5 responses API not working)
-        self.tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-
-    async def web_search(self, query: str) -> str:
+        # API clients are created on first use by the live transport
+        self.live_transport = LiveTransport()
+        # Carries completions, searches and lookups; swap for replay or fake backends
+        self.transport: Transport = self.live_transport
+        self.rule_engine = None  # Optional RuleEngine consulted before the LLM
+        self.cascade: Optional[CascadeConfig] = None  # Optional cheap-first model cascade
+        self.cascade_stats = CascadeStats()
+        self.stream = False  # Stream completions for token-driven progress and early fields
+        self.breakers: Dict[str, CircuitBreaker] = {}  # Dependency name -> shared circuit breaker
+        self.hedge_delay: Optional[float] = None  # Start a backup tool request after this many seconds
+
+    @property
+    def client(self):
+        """OpenAI client, created on first access"""
+        return self.live_transport.client
+
+    @client.setter
+    def client(self, client):
+        self.live_transport.client = client
+
+    @property
+    def tavily_client(self):
+        """Tavily client, created on first access"""
+        return self.live_transport.tavily_client
+
+    @tavily_client.setter
+    def tavily_client(self, tavily_client):
+        self.live_transport.tavily_client = tavily_client
+
+    async def _call_dependency(self, dependency: str, call) -> Any:
+        """Call a tool dependency through its circuit breaker, hedged if configured"""
+        return await guarded_call(call, self.breakers.get(dependency), self.hedge_delay)
+
+    def available_tools(self) -> List[Dict[str, Any]]:
+        """Tools whose dependency is currently healthy (breaker not open)"""
+        tools = []
+        for tool in TOOLS:
+            breaker = self.breakers.get(TOOL_DEPENDENCIES[tool["function"]["name"]])
+            if breaker is None or not breaker.is_open:
+                tools.append(tool)
+        return tools
+
+    async def web_search(self, query: str, key: Optional[str] = None) -> str:
+        """Search the web, sharing searches with the same key (by default identical queries) within a batch"""
+        cache = search_cache.get()
+        if cache is None:
+            return await self._web_search(query)
+
+        key = key or " ".join(query.lower().split())
+        if key not in cache:
+            cache[key] = asyncio.ensure_future(self._web_search(query))
+        return await asyncio.shield(cache[key])
+
+    async def _web_search(self, query: str) -> str:
         """Search the web using Tavily API"""
         try:
-            response = self.tavily_client.search(query)
+            with metrics.span("tavily", agent=self.name):
+                response = await self._call_dependency(
+                    "tavily", lambda: self.transport.search(query)
+                )
             if response and response.get('results'):
                 # Format search results for the agent
                 results = []
@@ -47,12 +188,12 @@ class BaseAgent:
             else:
                 return f"No relevant search results found for '{query}'"
         except Exception as e:
+            metrics.registry.record_error("tavily", agent=self.name)
             return f"Web search failed for '{query}': {str(e)}"
 
     async def lookup_product_ingredients(self, product_name: str, category: str = "") -> str:
         """Look up product ingredients using OpenFoodFacts API"""
         try:
-            import requests
             import urllib.parse
 
             # Encode the product name for URL
@@ -68,10 +209,10 @@ class BaseAgent:
                 if not url:
                     continue
 
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-
-                data = response.json()
+                with metrics.span("openfoodfacts", agent=self.name):
+                    data = await self._call_dependency(
+                        "openfoodfacts", lambda: self.transport.get_json(url, timeout=10)
+                    )
 
                 if data.get('products') and len(data['products']) > 0:
                     # Get the first (most relevant) product
@@ -97,15 +238,18 @@ class BaseAgent:
 
             return f"No ingredient data found for '{product_name}' in OpenFoodFacts database"
 
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
+            metrics.registry.record_error("openfoodfacts", agent=self.name)
             return f"Network error searching OpenFoodFacts: {str(e)}"
         except Exception as e:
+            metrics.registry.record_error("openfoodfacts", agent=self.name)
             return f"Error searching OpenFoodFacts for '{product_name}': {str(e)}"
         
     async def analyze(
         self, 
         product_data: Dict[str, Any],
-        progress_callback: Optional[Callable[[float], None]] = None
+        progress_callback: Optional[Callable[[float], None]] = None,
+        field_callback: Optional[Callable[[str, Any], None]] = None
     ) -> Dict[str, Any]:
         """
         Analyze product and return evaluation results
@@ -113,178 +257,397 @@ class BaseAgent:
         Args:
             product_data: Product information dictionary
             progress_callback: Optional callback for progress updates (progress: float)
+            field_callback: Optional callback for result fields as soon as they
+                stream in (field: str, value); only called when streaming
             
         Returns:
             Dictionary with score, recommendation, reasoning, and details
         """
+        with metrics.span("analyze", agent=self.name):
+            return await self._analyze(product_data, progress_callback, field_callback)
+
+    async def _analyze(
+        self,
+        product_data: Dict[str, Any],
+        progress_callback: Optional[Callable[[float], None]] = None,
+        field_callback: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """Run rules, then the model (or cascade), converting failures into an error result"""
         try:
             if progress_callback:
                 await progress_callback(0.1)
-            
+
+            # Deterministic rules may settle the result without an LLM call
+            hints = []
+            if self.rule_engine is not None:
+                decision = self.rule_engine.evaluate(self.name, product_data)
+                if decision.result is not None:
+                    if progress_callback:
+                        await progress_callback(1.0)
+                    decision.result["source"] = "rules"
+                    return decision.result
+                hints = decision.hints
+
             # Create analysis prompt
-            prompt = self._create_prompt(product_data)
+            with metrics.span("prompt_build", agent=self.name):
+                messages = self.build_messages(product_data, hints)
             
             if progress_callback:
                 await progress_callback(0.3)
-            
-            # Use OpenAI chat completions API with tool support
-            import json
 
-            messages = [
-                {
-                    "role": "system",
-                    "content": self._get_system_prompt() + "\n\nIMPORTANT: Respond in valid JSON format with keys: score (0-100), recommendation (buy/neutral/avoid), reasoning (string), confidence (0-100). If you need to search the web or look up ingredients, use the available function tools."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=1000,
-                tools=[
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "web_search",
-                            "description": "Search the web for current market prices, competitor information, and general product data",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "query": {
-                                        "type": "string",
-                                        "description": "The search query to look for current information"
-                                    }
-                                },
-                                "required": ["query"]
-                            }
-                        }
-                    },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "lookup_product_ingredients",
-                            "description": "Look up product ingredients using the OpenFoodFacts database",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "product_name": {
-                                        "type": "string",
-                                        "description": "The product name to search for ingredients"
-                                    },
-                                    "category": {
-                                        "type": "string",
-                                        "description": "The product category to help narrow the search"
-                                    }
-                                },
-                                "required": ["product_name"]
-                            }
-                        }
-                    }
-                ],
-                tool_choice="auto"
-            )
-
-            if progress_callback:
-                await progress_callback(0.7)
-
-            # Check if tool usage is needed
-            message = response.choices[0].message
-            if hasattr(message, 'tool_calls') and message.tool_calls:
-                # Execute tool calls
-                for tool_call in message.tool_calls:
-                    if tool_call.function.name == "web_search":
-                        tool_args = json.loads(tool_call.function.arguments)
-                        search_query = tool_args.get("query", "")
-
-                        # Perform web search
-                        search_results = await self.web_search(search_query)
-
-                        # Add search results to messages and get final response
-                        messages.append({
-                            "role": "assistant",
-                            "content": None,
-                            "tool_calls": [tool_call]
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "content": search_results,
-                            "tool_call_id": tool_call.id
-                        })
-
-                        # Get final response with search results
-                        final_response = await self.client.chat.completions.create(
-                            model=self.model,
-                            messages=messages,
-                            response_format={"type": "json_object"},
-                            temperature=0.7,
-                            max_tokens=1000
-                        )
-
-                        result = json.loads(final_response.choices[0].message.content)
-                        result.setdefault("details", {})
-                        result["search_results"] = search_results
-
-                    elif tool_call.function.name == "lookup_product_ingredients":
-                        tool_args = json.loads(tool_call.function.arguments)
-                        product_name = tool_args.get("product_name", "")
-                        category = tool_args.get("category", "")
-
-                        # Perform ingredient lookup
-                        ingredient_results = await self.lookup_product_ingredients(product_name, category)
-
-                        # Add ingredient results to messages and get final response
-                        messages.append({
-                            "role": "assistant",
-                            "content": None,
-                            "tool_calls": [tool_call]
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "content": ingredient_results,
-                            "tool_call_id": tool_call.id
-                        })
-
-                        # Get final response with ingredient data
-                        final_response = await self.client.chat.completions.create(
-                            model=self.model,
-                            messages=messages,
-                            response_format={"type": "json_object"},
-                            temperature=0.7,
-                            max_tokens=1000
-                        )
-
-                        result = json.loads(final_response.choices[0].message.content)
-                        result.setdefault("details", {})
-                        result["ingredient_data"] = ingredient_results
-                    else:
-                        result = self._parse_response(str(message.content) if message.content is not None else "")
+            progress = StreamProgress(progress_callback)
+            search_key = self.search_key(product_data)
+            if self.cascade is not None:
+                result = await self._run_cascade(messages, progress, field_callback, search_key)
             else:
-                # No tool usage needed
-                try:
-                    result = json.loads(message.content)
-                    result.setdefault("details", {})
-                except json.JSONDecodeError:
-                    result = self._parse_response(str(message.content) if message.content is not None else "")
+                usage = new_usage()
+                result, _ = await self._analyze_with_model(
+                    messages, self.model, progress, usage, field_callback, search_key
+                )
+                result["model"] = self.model
+                result["usage"] = usage
             
             if progress_callback:
                 await progress_callback(1.0)
             
+            result["source"] = "llm"
             return result
             
         except Exception as e:
-            return {
-                "score": 0,
-                "recommendation": "error",
-                "reasoning": f"Error during analysis: {str(e)}",
-                "confidence": 0,
-                "details": {}
+            metrics.registry.record_error("analyze", agent=self.name)
+            return error_result(f"Error during analysis: {str(e)}")
+
+    async def _run_cascade(
+        self,
+        messages: List[Dict[str, Any]],
+        progress: StreamProgress,
+        field_callback: Optional[Callable[[str, Any], None]] = None,
+        search_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Try each cascade model in turn until one gives a confident result"""
+        attempts = []
+        usages = []
+        for model in self.cascade.models:
+            usage = new_usage()
+            start = time.perf_counter()
+            try:
+                result, valid_json = await self._analyze_with_model(
+                    list(messages), model, progress, usage, field_callback, search_key
+                )
+            except Exception as e:
+                result, valid_json = error_result(f"Error during analysis: {str(e)}"), False
+            self.cascade_stats.record_attempt(model, time.perf_counter() - start)
+            attempts.append({"model": model, **usage})
+            usages.append(usage)
+
+            if not self.cascade.should_escalate(result, valid_json):
+                break
+
+        self.cascade_stats.record_run(self.cascade, attempts)
+        result["model"] = model
+        result["escalated"] = len(attempts) > 1
+        result["usage"] = merge_usage(usages)
+        return result
+
+    async def _complete(
+        self,
+        usage: Dict[str, Any],
+        progress: Optional[StreamProgress] = None,
+        field_callback: Optional[Callable[[str, Any], None]] = None,
+        phase: str = "first_completion",
+        **kwargs
+    ):
+        """Create a chat completion and record the round's tokens, cost and latency in usage"""
+        model = kwargs.get("model", self.model)
+        start = time.perf_counter()
+        with metrics.span(phase, agent=self.name, model=model):
+            if self.stream:
+                response = await self._complete_streaming(progress, field_callback, **kwargs)
+            else:
+                response = await self.transport.chat_completion(**kwargs)
+        latency = time.perf_counter() - start
+
+        prompt_tokens = completion_tokens = cached_tokens = 0
+        if getattr(response, "usage", None):
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            prompt_tokens = response.usage.prompt_tokens
+            completion_tokens = response.usage.completion_tokens
+            cached_tokens = getattr(details, "cached_tokens", None) or 0
+            metrics.registry.record_tokens(
+                self.name, model, prompt_tokens, completion_tokens, cached_tokens
+            )
+        record_round(usage, phase, model, prompt_tokens, completion_tokens, cached_tokens, latency)
+        return response
+
+    async def _complete_streaming(
+        self,
+        progress: Optional[StreamProgress],
+        field_callback: Optional[Callable[[str, Any], None]],
+        **kwargs
+    ):
+        """
+        Stream a chat completion, reporting progress per received chunk and
+        top-level JSON fields as soon as they complete
+
+        Returns:
+            Response-like object with the assembled message and usage
+        """
+        stream = await self.transport.chat_completion(
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        parser = IncrementalJSONParser()
+        content = []
+        tool_calls: Dict[int, Dict[str, str]] = {}
+        usage = None
+
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content.append(delta.content)
+                for field, value in parser.feed(delta.content):
+                    if field_callback:
+                        await field_callback(field, value)
+
+            for tool_delta in delta.tool_calls or []:
+                entry = tool_calls.setdefault(tool_delta.index, {"id": "", "name": "", "arguments": ""})
+                if tool_delta.id:
+                    entry["id"] = tool_delta.id
+                if tool_delta.function:
+                    entry["name"] += tool_delta.function.name or ""
+                    entry["arguments"] += tool_delta.function.arguments or ""
+
+            if progress:
+                await progress.advance()
+
+        message = SimpleNamespace(
+            content="".join(content) if content else None,
+            tool_calls=[
+                SimpleNamespace(
+                    id=entry["id"],
+                    type="function",
+                    function=SimpleNamespace(name=entry["name"], arguments=entry["arguments"])
+                )
+                for _, entry in sorted(tool_calls.items())
+            ] or None
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def _tool_call_message(self, tool_call) -> Dict[str, Any]:
+        """Build the assistant message that carries a tool call"""
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments
+                }
+            }]
+        }
+
+    async def _analyze_with_model(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        progress: StreamProgress,
+        usage: Dict[str, Any],
+        field_callback: Optional[Callable[[str, Any], None]] = None,
+        search_key: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run the completion and tool round trip with one model
+
+        Args:
+            search_key: Optional key the web search is shared under in a batch
+
+        Returns:
+            Tuple of the parsed result and whether the model returned valid JSON
+        """
+        valid_json = True
+        params = self.request_params(model, messages)
+        progress.begin(0.3, 0.95)
+        response = await self._complete(
+            usage,
+            progress,
+            field_callback,
+            **params
+        )
+
+        await progress.set(0.7, force=True)
+
+        # Check if tool usage is needed
+        message = response.choices[0].message
+        if hasattr(message, 'tool_calls') and message.tool_calls:
+            # Execute tool calls
+            for tool_call in message.tool_calls:
+                if tool_call.function.name == "web_search":
+                    tool_args = json.loads(tool_call.function.arguments)
+                    search_query = tool_args.get("query", "")
+
+                    # Perform web search
+                    usage["tool_calls"] += 1
+                    search_results = await self.web_search(search_query, search_key)
+
+                    # Add search results to messages and get final response
+                    messages.append(self._tool_call_message(tool_call))
+                    messages.append({
+                        "role": "tool",
+                        "content": search_results,
+                        "tool_call_id": tool_call.id
+                    })
+
+                    # Get final response with search results
+                    progress.begin(0.7, 0.95)
+                    final_response = await self._complete(
+                        usage,
+                        progress,
+                        field_callback,
+                        phase="followup_completion",
+                        model=model,
+                        messages=messages,
+                        response_format={"type": "json_object"},
+                        temperature=0.7,
+                        max_tokens=1000,
+                        tools=params["tools"],  # Same tools as the first call keep the cached prefix
+                        tool_choice="none"
+                    )
+
+                    result = json.loads(final_response.choices[0].message.content)
+                    result.setdefault("details", {})
+                    result["search_results"] = search_results
+
+                elif tool_call.function.name == "lookup_product_ingredients":
+                    tool_args = json.loads(tool_call.function.arguments)
+                    product_name = tool_args.get("product_name", "")
+                    category = tool_args.get("category", "")
+
+                    # Perform ingredient lookup
+                    usage["tool_calls"] += 1
+                    ingredient_results = await self.lookup_product_ingredients(product_name, category)
+
+                    # Add ingredient results to messages and get final response
+                    messages.append(self._tool_call_message(tool_call))
+                    messages.append({
+                        "role": "tool",
+                        "content": ingredient_results,
+                        "tool_call_id": tool_call.id
+                    })
+
+                    # Get final response with ingredient data
+                    progress.begin(0.7, 0.95)
+                    final_response = await self._complete(
+                        usage,
+                        progress,
+                        field_callback,
+                        phase="followup_completion",
+                        model=model,
+                        messages=messages,
+                        response_format={"type": "json_object"},
+                        temperature=0.7,
+                        max_tokens=1000,
+                        tools=params["tools"],  # Same tools as the first call keep the cached prefix
+                        tool_choice="none"
+                    )
+
+                    result = json.loads(final_response.choices[0].message.content)
+                    result.setdefault("details", {})
+                    result["ingredient_data"] = ingredient_results
+                else:
+                    valid_json = False
+                    result = self._parse_response(str(message.content) if message.content is not None else "")
+        else:
+            # No tool usage needed
+            result, valid_json = self.parse_content(message.content)
+
+        return result, valid_json
+
+    def build_messages(
+        self,
+        product_data: Dict[str, Any],
+        hints: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Build the chat messages sent for a product (static system prefix first)"""
+        prompt = self._create_prompt(product_data)
+        if hints:
+            prompt += "\n\nPre-screening notes:\n" + "\n".join(f"- {hint}" for hint in hints)
+
+        # Use OpenAI chat completions API with tool support
+        return [
+            self._get_system_message(),
+            {
+                "role": "user",
+                "content": prompt
             }
+        ]
+
+    def request_params(self, model: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Chat completion parameters for the first (tool-enabled) request
+
+        Tools whose dependency's circuit breaker is open are left out, so the
+        model answers directly instead of waiting on a failing tool round trip.
+        """
+        params = {
+            "model": model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+        tools = self.available_tools()
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = "auto"
+        return params
+
+    def parse_content(self, content: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parse a completion's message content into a result
+
+        Returns:
+            Tuple of the result and whether the content was valid JSON
+        """
+        try:
+            result = json.loads(content)
+            result.setdefault("details", {})
+            return result, True
+        except json.JSONDecodeError:
+            return self._parse_response(str(content) if content is not None else ""), False
+    
+    def share_key(self, product_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Key under which this agent's result can be shared across products in
+        a batch, or None if every product needs its own analysis
+        """
+        return None
+    
+    def search_key(self, product_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Key under which this agent's web search can be shared across products
+        in a batch, or None to share only identical queries
+        """
+        return None
+    
+    def _get_system_message(self) -> Dict[str, str]:
+        """Get the static system message, built once per agent class"""
+        cls = type(self)
+        message = cls.__dict__.get("_system_message")
+        if message is None:
+            message = {
+                "role": "system",
+                "content": self._get_system_prompt() + "\n\n" + OUTPUT_CONTRACT
+            }
+            cls._system_message = message
+        return message
     
     def _get_system_prompt(self) -> str:
         """Get system prompt for the agent"""
@@ -381,8 +744,19 @@ class CostAnalysisAgent(BaseAgent):
         Average Rating: {product_data.get('rating', 'N/A')}
 
         Please provide a comprehensive cost analysis with a score (0-100) and detailed reasoning.
-        If you need current market data, search for: "{product_data.get('name', '')} price comparison {product_data.get('category', '')}"
+        If you need current market data, search for: "{self._price_comparison_query(product_data)}"
         """
+    
+    def search_key(self, product_data: Dict[str, Any]) -> Optional[str]:
+        # Market prices depend on the category, so one search covers a category's products
+        category = " ".join(str(product_data.get('category') or '').lower().split())
+        return f"price comparison {category}" if category else None
+    
+    def _price_comparison_query(self, product_data: Dict[str, Any]) -> str:
+        category = product_data.get('category')
+        if category:
+            return f"{category} price comparison"
+        return f"{product_data.get('name', '')} price comparison"
 
 
 class SupplierTrustAgent(BaseAgent):
@@ -395,6 +769,11 @@ class SupplierTrustAgent(BaseAgent):
             description="Assesses supplier reliability, reputation, and trustworthiness"
         )
     
+    def share_key(self, product_data: Dict[str, Any]) -> Optional[str]:
+        # Supplier trust depends on the brand, so one run covers a brand's products
+        brand = " ".join(str(product_data.get('brand') or '').lower().split())
+        return brand or None
+    
     def _get_system_prompt(self) -> str:
         return """You are a supplier trust and reputation expert.
         Your task is to evaluate suppliers based on:
@@ -522,3 +901,25 @@ class IngredientSafetyAgent(BaseAgent):
         Analyze each ingredient for safety, potential health risks, and overall health impact.
         Provide a score (0-100) and detailed reasoning with specific ingredient concerns if any.
         """
+
+
+# Agents AgenticShopLab can run, by key, in default evaluation order
+AGENT_REGISTRY: Dict[str, Type[BaseAgent]] = {
+    "cost": CostAnalysisAgent,
+    "supplier": SupplierTrustAgent,
+    "sustainability": SustainabilityAgent,
+    "safety": IngredientSafetyAgent,
+}
+
+
+def register_agent(key: str, agent_class: Type[BaseAgent]):
+    """
+    Make an agent class available to AgenticShopLab under a key
+
+    Args:
+        key: Short identifier used to select the agent (e.g. "cost")
+        agent_class: BaseAgent subclass constructible without arguments
+    """
+    if not issubclass(agent_class, BaseAgent):
+        raise TypeError(f"{agent_class.__name__} is not a BaseAgent subclass")
+    AGENT_REGISTRY[key] = agent_class
@@ -0,0 +1,95 @@
+"""
+Model cascades: try a cheaper model first and escalate on low confidence
+"""
+
+from typing import Dict, Any, List, Optional
+from .usage import estimate_cost
+
+
+class CascadeConfig:
+    """
+    Ordered list of models to try for an agent.
+
+    Each model is tried in turn; the cascade stops at the first result whose
+    JSON was valid and whose confidence reaches the threshold. The last model
+    is always accepted.
+    """
+
+    def __init__(self, models: List[str], confidence_threshold: int = 70):
+        if not models:
+            raise ValueError("A cascade needs at least one model")
+        self.models = list(models)
+        self.confidence_threshold = confidence_threshold
+
+    def should_escalate(self, result: Dict[str, Any], valid_json: bool) -> bool:
+        """Check whether a result is too weak to accept"""
+        if not valid_json or result.get("recommendation") == "error":
+            return True
+        try:
+            confidence = float(result.get("confidence", 0))
+        except (TypeError, ValueError):
+            return True
+        return confidence < self.confidence_threshold
+
+
+class CascadeStats:
+    """Running escalation, latency and cost metrics for one agent's cascade"""
+
+    def __init__(self):
+        self.runs = 0
+        self.escalations = 0
+        self.latency: Dict[str, List[float]] = {}  # model -> [total seconds, calls]
+        self.cost_saved = 0.0
+
+    def record_attempt(self, model: str, seconds: float):
+        """Record the latency of one model attempt"""
+        totals = self.latency.setdefault(model, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+    def record_run(
+        self,
+        config: CascadeConfig,
+        attempts: List[Dict[str, Any]]
+    ):
+        """
+        Record a finished cascade run
+
+        Args:
+            config: Cascade that was run
+            attempts: One entry per model tried, with model and token counts
+        """
+        self.runs += 1
+        if len(attempts) > 1:
+            self.escalations += 1
+
+        # Savings are measured against sending the same tokens to the strongest model
+        strongest = config.models[-1]
+        final = attempts[-1]
+        if final["model"] != strongest:
+            self.cost_saved += (
+                estimate_cost(strongest, final["prompt_tokens"], final["completion_tokens"])
+                - estimate_cost(final["model"], final["prompt_tokens"], final["completion_tokens"])
+            )
+        for attempt in attempts[:-1]:
+            self.cost_saved -= estimate_cost(
+                attempt["model"], attempt["prompt_tokens"], attempt["completion_tokens"]
+            )
+
+    def average_latency(self, model: str) -> Optional[float]:
+        """Average seconds per attempt for a model, if it has been used"""
+        totals = self.latency.get(model)
+        if not totals or not totals[1]:
+            return None
+        return totals[0] / totals[1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.runs if self.runs else 0.0,
+            "average_latency": {
+                model: self.average_latency(model) for model in self.latency
+            },
+            "estimated_cost_saved_usd": round(self.cost_saved, 6),
+        }
@@ -0,0 +1,278 @@
+"""
+Bulk catalog evaluation: stream products from JSONL/CSV through AgenticShopLab
+
+Usage:
+    python -m agentic_shop_lab.catalog products.jsonl -o results.jsonl \\
+        --concurrency 8 --rate 2
+
+Results are appended to the output file as JSONL as each product finishes. A
+checkpoint file next to the output records which input lines are done, so a
+rerun after a crash skips finished products and continues where it stopped.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, Callable, Iterator, Optional, Set, Tuple
+from .framework import AgenticShopLab, EXECUTION_MODES
+from .rules import RuleEngine
+
+
+NUMERIC_FIELDS = ("price", "rating")
+
+
+def iter_products(
+    path: str,
+    on_error: Optional[Callable[[int, ValueError], None]] = None
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lazily read products from a JSONL or CSV file
+
+    Args:
+        path: Catalog file
+        on_error: Optional callback for JSONL lines that are not valid JSON
+            objects (index, error); those lines are then skipped instead of
+            raising
+
+    Yields:
+        Tuples of (line index, product dictionary); blank JSONL lines are skipped
+        but still counted so indexes stay stable across runs
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for index, row in enumerate(csv.DictReader(f)):
+                product = {k: v for k, v in row.items() if v not in (None, "")}
+                for field in NUMERIC_FIELDS:
+                    if field in product:
+                        try:
+                            product[field] = float(product[field])
+                        except ValueError:
+                            pass
+                yield index, product
+        else:
+            for index, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    product = json.loads(line)
+                    if not isinstance(product, dict):
+                        raise ValueError(f"expected a JSON object, got {type(product).__name__}")
+                except ValueError as e:
+                    if on_error is None:
+                        raise ValueError(f"{path} line {index + 1}: {e}") from e
+                    on_error(index, e)
+                    continue
+                yield index, product
+
+
+class RateLimiter:
+    """Token-bucket limiter for evaluations started per second"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available"""
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Checkpoint:
+    """
+    Tracks finished input lines with a low watermark.
+
+    Every index below the watermark is done; only indexes finished out of order
+    above it are kept individually, so the checkpoint stays small no matter
+    how large the catalog is.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark = 0
+        self.done: Set[int] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.watermark = data.get("watermark", 0)
+            self.done = set(data.get("done", []))
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark_done(self, index: int):
+        """Mark an index done and advance the watermark past contiguous indexes"""
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self):
+        """Atomically persist the checkpoint"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+
+async def run_catalog(
+    input_path: str,
+    output_path: str,
+    framework: AgenticShopLab,
+    concurrency: int = 4,
+    rate: float = 0.0,
+    checkpoint_path: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Evaluate every product in a catalog file
+
+    Args:
+        input_path: JSONL or CSV file of products
+        output_path: JSONL file results are appended to
+        framework: Framework used to evaluate each product
+        concurrency: Maximum evaluations in flight
+        rate: Maximum evaluations started per second (0 for unlimited)
+        checkpoint_path: Checkpoint file (defaults to output_path + ".checkpoint")
+        limit: Stop after this many products have been evaluated in this run
+
+    Returns:
+        Counts of evaluated, failed and skipped products
+
+    Raises:
+        ValueError: If concurrency is less than 1
+    """
+    if concurrency < 1:
+        # A zero-size queue would be unbounded and no worker would drain it
+        raise ValueError("Catalog concurrency must be at least 1")
+    checkpoint = Checkpoint(checkpoint_path or output_path + ".checkpoint")
+    limiter = RateLimiter(rate)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"evaluated": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def record(index: int, entry: Dict[str, Any]):
+            # Write the result before checkpointing so a crash can only cause a rerun
+            out.write(json.dumps(entry) + "\n")
+            out.flush()
+            checkpoint.mark_done(index)
+            checkpoint.save()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                index, product = item
+                entry = {"index": index, "id": product.get("id"), "name": product.get("name")}
+                try:
+                    await limiter.acquire()
+                    entry["result"] = await framework.evaluate_product(product)
+                    counts["evaluated"] += 1
+                except Exception as e:
+                    entry["error"] = str(e)
+                    counts["failed"] += 1
+                record(index, entry)
+                done = counts["evaluated"] + counts["failed"]
+                if done % 50 == 0:
+                    elapsed = time.monotonic() - started
+                    print(f"{done} products evaluated ({done / elapsed:.2f}/s)", file=sys.stderr)
+                queue.task_done()
+
+        def invalid_line(index: int, error: ValueError):
+            # Recorded like a failed product so reruns move past the line
+            if not checkpoint.is_done(index):
+                counts["failed"] += 1
+                record(index, {"index": index, "error": f"Invalid input line: {error}"})
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        producer_error: Optional[Exception] = None
+        try:
+            submitted = 0
+            expected = checkpoint.watermark
+            for index, product in iter_products(input_path, on_error=invalid_line):
+                # Blank lines below this index have no product to evaluate
+                for missing in range(expected, index):
+                    if not checkpoint.is_done(missing):
+                        checkpoint.mark_done(missing)
+                expected = index + 1
+
+                if checkpoint.is_done(index):
+                    counts["skipped"] += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                await queue.put((index, product))
+                submitted += 1
+        except Exception as e:
+            # Let in-flight evaluations finish and be recorded before failing
+            producer_error = e
+
+        try:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    if producer_error is not None:
+        raise producer_error
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a product catalog in bulk")
+    parser.add_argument("input", help="JSONL or CSV file of products")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append results to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum evaluations in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="Maximum evaluations started per second (0 = unlimited)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--mode", choices=EXECUTION_MODES, default="fanout", help="Agent execution mode")
+    parser.add_argument("--rules", help="Pre-scoring rules file")
+    parser.add_argument("--limit", type=int, help="Evaluate at most this many products in this run")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    framework = AgenticShopLab(
+        rule_engine=RuleEngine.from_file(args.rules) if args.rules else None,
+        mode=args.mode
+    )
+    counts = asyncio.run(run_catalog(
+        args.input,
+        args.output,
+        framework,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        checkpoint_path=args.checkpoint,
+        limit=args.limit
+    ))
+    print(
+        f"Done: {counts['evaluated']} evaluated, {counts['failed']} failed, "
+        f"{counts['skipped']} already finished",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
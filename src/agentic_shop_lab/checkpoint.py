@@ -0,0 +1,92 @@
+"""
+Durable checkpoints of in-flight evaluations
+
+Each evaluation is stored as one JSON file holding its request and the agent
+results finished so far. A restarted process reads them back and runs only
+the agents that had not finished.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, Any, List
+
+
+class CheckpointStore:
+    """
+    Evaluation checkpoints kept as <key>.json files in a directory.
+
+    Files are replaced atomically, so a process killed mid-write leaves the
+    previous checkpoint intact. Writes run in the default executor to keep
+    file I/O off the event loop; a lock per key keeps overlapping saves of one
+    evaluation in order.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._locks: Dict[str, asyncio.Lock] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if os.sep in key or key.startswith("."):
+            raise ValueError(f"Invalid checkpoint key '{key}'")
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def save(self, key: str, record: Dict[str, Any]):
+        """Write a checkpoint, replacing any previous one for the key"""
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            # Serialized under the lock so the newest state is written last,
+            # and on the loop thread so later changes can't race the write
+            data = json.dumps(record, default=str).encode("utf-8")
+            write = asyncio.get_running_loop().run_in_executor(None, self._write, key, data)
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The thread keeps writing; hold the lock until it lands so a
+                # following remove isn't undone by it
+                await write
+                raise
+
+    async def remove(self, key: str):
+        """Delete a checkpoint once its evaluation has finished"""
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            await asyncio.get_running_loop().run_in_executor(None, self._remove, key)
+        self._locks.pop(key, None)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Read every stored checkpoint, reporting (and keeping) unreadable files"""
+        records = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json") or name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Unreadable checkpoint {path} was not resumed: {e}", file=sys.stderr)
+        return records
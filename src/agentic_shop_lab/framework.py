@@ -3,30 +3,169 @@ Main framework for coordinating multiple AI agents
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional, Callable
+import copy
+from typing import Dict, Any, List, Optional, Callable, Union
 from .agents import (
-    CostAnalysisAgent,
-    SupplierTrustAgent,
-    SustainabilityAgent,
-    IngredientSafetyAgent
+    BaseAgent,
+    AGENT_REGISTRY,
+    TOOL_DEPENDENCIES,
+    error_result,
+    search_cache
 )
+from . import metrics
+from .rules import RuleEngine
+from .cascade import CascadeConfig
+from .fused import FusedEvaluator
+from .usage import UsageTracker, merge_usage
+from .transport import Transport
+from .resilience import CircuitBreaker
+
+
+EXECUTION_MODES = ("fanout", "fused")
+
+# Weight of an agent in the overall score unless configured otherwise
+DEFAULT_AGENT_WEIGHT = 1.0
+
+# Products of a batch evaluated at once unless configured otherwise
+DEFAULT_BATCH_CONCURRENCY = 8
 
 
 class AgenticShopLab:
     """
     Main framework for coordinating multiple specialized agents
     to evaluate products comprehensively
+
+    agents lists the registry keys to enable (see AGENT_REGISTRY, default all)
+    and weights sets the default score weight per agent key or name; agents
+    without one get DEFAULT_AGENT_WEIGHT. Both can be narrowed per evaluation.
     """
     
-    def __init__(self):
-        self.agents = [
-            CostAnalysisAgent(),
-            SupplierTrustAgent(),
-            SustainabilityAgent(),
-            IngredientSafetyAgent()
-        ]
+    def __init__(
+        self,
+        rule_engine: Optional[RuleEngine] = None,
+        mode: str = "fanout",
+        cascade: Optional[Union[CascadeConfig, Dict[str, CascadeConfig]]] = None,
+        stream: bool = False,
+        breaker_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        hedge_delay: Optional[float] = None,
+        agents: Optional[List[str]] = None,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}")
+        self.agent_keys = list(agents) if agents else list(AGENT_REGISTRY)
+        unknown = [key for key in self.agent_keys if key not in AGENT_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown agents {unknown}, expected some of {list(AGENT_REGISTRY)}")
+        self._weight_overrides = dict(weights or {})
+        self._weights: Optional[Dict[str, float]] = None
+        self.rule_engine = rule_engine
+        self.cascade = cascade
+        self.stream = stream
+        self.mode = mode
+        # One breaker per tool dependency, shared by all agents (0 disables them)
+        self.breakers: Dict[str, CircuitBreaker] = {
+            dependency: CircuitBreaker(dependency, breaker_threshold, breaker_reset_timeout)
+            for dependency in sorted(set(TOOL_DEPENDENCIES.values()))
+        } if breaker_threshold > 0 else {}
+        self.hedge_delay = hedge_delay
+        self.usage_tracker = UsageTracker()
         self.results = {}
         self.progress = {}
+        # Agents are built on first use so constructing the framework stays cheap
+        self._agents: Optional[List[BaseAgent]] = None
+        self._fused_evaluator: Optional[FusedEvaluator] = None
+    
+    @property
+    def agents(self) -> List[BaseAgent]:
+        """The evaluation agents, constructed and configured on first access"""
+        if self._agents is None:
+            agents = []
+            for key in self.agent_keys:
+                agent = AGENT_REGISTRY[key]()
+                agent.key = key
+                agent.rule_engine = self.rule_engine
+                if isinstance(self.cascade, dict):
+                    agent.cascade = self.cascade.get(agent.name)
+                else:
+                    agent.cascade = self.cascade
+                agent.stream = self.stream
+                agent.breakers = self.breakers
+                agent.hedge_delay = self.hedge_delay
+                agents.append(agent)
+            self._agents = agents
+        return self._agents
+    
+    @property
+    def weights(self) -> Dict[str, float]:
+        """Default score weight of each enabled agent, by agent name"""
+        if self._weights is None:
+            self._weights = {agent.name: DEFAULT_AGENT_WEIGHT for agent in self.agents}
+            self._weights.update(self.resolve_weights(self._weight_overrides))
+        return self._weights
+    
+    def select_agents(self, selection: Optional[List[str]] = None) -> List[BaseAgent]:
+        """
+        Look up enabled agents by registry key or name
+        
+        Args:
+            selection: Agent keys or names; None selects every enabled agent
+            
+        Returns:
+            The selected agents, in evaluation order
+            
+        Raises:
+            ValueError: If an entry matches no enabled agent or none are selected
+        """
+        if selection is None:
+            return self.agents
+        wanted = set(selection)
+        known = {agent.key for agent in self.agents} | {agent.name for agent in self.agents}
+        unknown = sorted(wanted - known)
+        if unknown:
+            raise ValueError(f"Unknown agents {unknown}, expected some of {self.agent_keys}")
+        selected = [agent for agent in self.agents if agent.key in wanted or agent.name in wanted]
+        if not selected:
+            raise ValueError("At least one agent must be selected")
+        return selected
+    
+    def resolve_weights(self, weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """
+        Map weights given by agent key or name to agent names
+        
+        Raises:
+            ValueError: For unknown agents or negative weights
+        """
+        resolved = {}
+        for selector, weight in (weights or {}).items():
+            agent = self.select_agents([selector])[0]
+            if weight < 0:
+                raise ValueError(f"Weight for '{selector}' must not be negative")
+            resolved[agent.name] = float(weight)
+        return resolved
+    
+    def selection_weights(
+        self,
+        agents: List[BaseAgent],
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """
+        Score weights for an evaluation: the framework's, overridden by weights
+        
+        Raises:
+            ValueError: For invalid weights or a zero total over the selected agents
+        """
+        merged = {**self.weights, **self.resolve_weights(weights)}
+        if sum(merged[agent.name] for agent in agents) <= 0:
+            raise ValueError("Weights of the selected agents must not all be zero")
+        return merged
+    
+    @property
+    def fused_evaluator(self) -> FusedEvaluator:
+        if self._fused_evaluator is None:
+            self._fused_evaluator = FusedEvaluator(self.agents)
+        return self._fused_evaluator
         
     def get_agents_info(self) -> List[Dict[str, str]]:
         """Get information about all available agents"""
@@ -34,34 +173,111 @@ class AgenticShopLab:
             {
                 "name": agent.name,
                 "emoji": agent.emoji,
-                "description": agent.description
+                "description": agent.description,
+                "key": agent.key,
+                "weight": self.weights[agent.name]
             }
             for agent in self.agents
         ]
     
+    def set_transport(self, transport: Transport):
+        """Route every agent's completions, searches and lookups through a transport"""
+        for agent in self.agents:
+            agent.transport = transport
+    
+    def get_dependency_health(self) -> Dict[str, Dict[str, Any]]:
+        """Get the circuit breaker state of each tool dependency"""
+        return {name: breaker.to_dict() for name, breaker in self.breakers.items()}
+    
+    def get_usage(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Get running token, call and cost totals per agent and tenant"""
+        return self.usage_tracker.summary(tenant)
+    
+    def get_cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get escalation, latency and cost metrics for agents with a cascade"""
+        return {
+            agent.name: agent.cascade_stats.to_dict()
+            for agent in self.agents
+            if agent.cascade is not None
+        }
+    
     async def evaluate_product(
         self,
         product_data: Dict[str, Any],
-        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None
+        progress_callback: Optional[Callable[[Dict[str, float]], None]] = None,
+        mode: Optional[str] = None,
+        field_callback: Optional[Callable[[str, str, Any], None]] = None,
+        shared_work: Optional[Dict[tuple, "asyncio.Future"]] = None,
+        tenant: Optional[str] = None,
+        agents: Optional[List[str]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        completed_results: Optional[Dict[str, Dict[str, Any]]] = None,
+        result_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
-        Evaluate a product using all available agents
+        Evaluate a product using all or some of the enabled agents
         
         Args:
             product_data: Product information dictionary
             progress_callback: Optional callback for progress updates
+            mode: "fanout" (one completion per agent) or "fused" (one
+                completion for all agents); defaults to the framework mode
+            field_callback: Optional callback for agent result fields as they
+                stream in (agent_name, field, value)
+            shared_work: Optional cache of in-flight agent runs shared between
+                products of one batch (see evaluate_batch)
+            tenant: Optional tenant the evaluation's token usage is billed to
+            agents: Optional agent keys or names to run; the others are skipped
+                and left out of the aggregation
+            weights: Optional score weights by agent key or name, overriding
+                the framework's weights for this evaluation
+            completed_results: Optional results, by agent name, from an earlier
+                interrupted run; those agents are not run again
+            result_callback: Optional callback as each agent finishes
+                (agent_name, result), e.g. to checkpoint partial results
             
         Returns:
-            Comprehensive evaluation results from all agents
+            Comprehensive evaluation results from the selected agents
         """
-        # Initialize progress tracking
-        self.progress = {agent.name: 0.0 for agent in self.agents}
+        mode = mode or self.mode
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}")
+        selected = self.select_agents(agents)
+        agent_weights = self.selection_weights(selected, weights)
+
+        with metrics.span("evaluate_product", mode=mode):
+            evaluation = await self._evaluate_product(
+                product_data, progress_callback, mode, field_callback, shared_work,
+                selected, agent_weights, completed_results or {}, result_callback
+            )
+        self.usage_tracker.record_evaluation(evaluation["agent_results"], tenant)
+        return evaluation
+    
+    async def _evaluate_product(
+        self,
+        product_data: Dict[str, Any],
+        progress_callback: Optional[Callable[[Dict[str, float]], None]],
+        mode: str,
+        field_callback: Optional[Callable[[str, str, Any], None]],
+        shared_work: Optional[Dict[tuple, "asyncio.Future"]],
+        agents: List[BaseAgent],
+        weights: Dict[str, float],
+        completed_results: Dict[str, Dict[str, Any]],
+        result_callback: Optional[Callable[[str, Dict[str, Any]], None]]
+    ) -> Dict[str, Any]:
+        """Run the selected agents for one product and aggregate their results"""
+        # Initialize progress tracking (local, so concurrent evaluations don't mix)
+        agent_progress = {
+            agent.name: 1.0 if agent.name in completed_results else 0.0
+            for agent in agents
+        }
+        self.progress = agent_progress
         
         async def agent_progress_callback(agent_name: str, progress: float):
             """Update progress for a specific agent"""
-            self.progress[agent_name] = progress
+            agent_progress[agent_name] = progress
             if progress_callback:
-                await progress_callback(self.progress.copy())
+                await progress_callback(agent_progress.copy())
         
         def create_progress_callback(agent_name: str):
             """Create a progress callback closure for a specific agent"""
@@ -69,34 +285,161 @@ class AgenticShopLab:
                 await agent_progress_callback(agent_name, progress)
             return callback
         
-        # Run all agents in parallel
-        tasks = []
-        for agent in self.agents:
-            task = agent.analyze(
+        def create_field_callback(agent_name: str):
+            """Create a streamed-field callback closure for a specific agent"""
+            if not field_callback:
+                return None
+            async def callback(field: str, value: Any):
+                await field_callback(agent_name, field, value)
+            return callback
+        
+        # Agents finished by an earlier, interrupted run are not repeated
+        remaining = [agent for agent in agents if agent.name not in completed_results]
+        
+        if mode == "fused":
+            agent_results = await self.fused_evaluator.analyze(
                 product_data,
-                create_progress_callback(agent.name)
+                agent_progress_callback,
+                remaining
+            ) if remaining else {}
+            if result_callback:
+                for name, result in agent_results.items():
+                    await result_callback(name, result)
+            agent_results.update(completed_results)
+            return self._compile_results(
+                {agent.name: agent_results[agent.name] for agent in agents}, weights
             )
-            tasks.append(task)
         
-        # Wait for all agents to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def run_agent(agent: BaseAgent) -> Dict[str, Any]:
+            result = await self._run_agent(
+                agent,
+                product_data,
+                create_progress_callback(agent.name),
+                create_field_callback(agent.name),
+                shared_work
+            )
+            if result_callback:
+                await result_callback(agent.name, result)
+            return result
+        
+        # Run the remaining agents in parallel and wait for all to complete
+        results = dict(zip(
+            (agent.name for agent in remaining),
+            await asyncio.gather(*(run_agent(agent) for agent in remaining), return_exceptions=True)
+        ))
+        results.update(completed_results)
         
         # Compile results
         agent_results = {}
-        for agent, result in zip(self.agents, results):
+        for agent in agents:
+            result = results[agent.name]
             if isinstance(result, Exception):
-                agent_results[agent.name] = {
-                    "score": 0,
-                    "recommendation": "error",
-                    "reasoning": f"Error: {str(result)}",
-                    "confidence": 0,
-                    "details": {}
-                }
+                agent_results[agent.name] = error_result(f"Error: {str(result)}")
             else:
                 agent_results[agent.name] = result
         
+        return self._compile_results(agent_results, weights)
+    
+    async def _run_agent(
+        self,
+        agent,
+        product_data: Dict[str, Any],
+        progress_callback: Callable[[float], None],
+        field_callback: Optional[Callable[[str, Any], None]],
+        shared_work: Optional[Dict[tuple, "asyncio.Future"]]
+    ) -> Dict[str, Any]:
+        """Run one agent, reusing an identical run from the same batch if there is one"""
+        key = agent.share_key(product_data) if shared_work is not None else None
+        if key is None:
+            return await agent.analyze(product_data, progress_callback, field_callback)
+
+        shared_key = (agent.name, key)
+        if shared_key not in shared_work:
+            shared_work[shared_key] = asyncio.ensure_future(
+                agent.analyze(product_data, progress_callback, field_callback)
+            )
+            return await asyncio.shield(shared_work[shared_key])
+
+        result = copy.deepcopy(await asyncio.shield(shared_work[shared_key]))
+        result["shared"] = True
+        await progress_callback(1.0)
+        return result
+    
+    async def evaluate_batch(
+        self,
+        products: List[Dict[str, Any]],
+        item_callback: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        progress_callback: Optional[Callable[[int, Dict[str, float]], None]] = None,
+        mode: Optional[str] = None,
+        tenant: Optional[str] = None,
+        agents: Optional[List[str]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate several products, sharing common work between them
+        
+        Agents that declare a share_key (e.g. Supplier Trust per brand) run once
+        per distinct key, and web searches with the same search_key (e.g. Cost
+        Analysis per category) or query run once per batch.
+        
+        Args:
+            products: Product information dictionaries
+            item_callback: Optional callback when a product finishes (index, result)
+            progress_callback: Optional callback for per-product progress (index, progress)
+            mode: Execution mode, as for evaluate_product
+            tenant: Optional tenant the batch's token usage is billed to
+            agents: Optional agent keys or names to run, as for evaluate_product
+            weights: Optional score weights, as for evaluate_product
+            concurrency: Maximum products evaluated at once
+            
+        Returns:
+            Evaluation results in the same order as products; failed products
+            get a dictionary with an "error" key
+        """
+        if concurrency < 1:
+            raise ValueError("Batch concurrency must be at least 1")
+        shared_work: Dict[tuple, asyncio.Future] = {}
+        semaphore = asyncio.Semaphore(concurrency)
+        token = search_cache.set({})
+        
+        async def run_item(index: int, product_data: Dict[str, Any]) -> Dict[str, Any]:
+            async def item_progress(progress: Dict[str, float]):
+                if progress_callback:
+                    await progress_callback(index, progress)
+            
+            try:
+                async with semaphore:
+                    result = await self.evaluate_product(
+                        product_data,
+                        item_progress,
+                        mode=mode,
+                        shared_work=shared_work,
+                        tenant=tenant,
+                        agents=agents,
+                        weights=weights
+                    )
+            except Exception as e:
+                result = {"error": str(e)}
+            if item_callback:
+                await item_callback(index, result)
+            return result
+        
+        try:
+            return await asyncio.gather(
+                *(run_item(i, product) for i, product in enumerate(products))
+            )
+        finally:
+            search_cache.reset(token)
+    
+    def _compile_results(
+        self,
+        agent_results: Dict[str, Dict[str, Any]],
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """Aggregate per-agent results into the overall evaluation"""
         # Calculate overall score and recommendation
-        overall_score = self._calculate_overall_score(agent_results)
+        overall_score = self._calculate_overall_score(agent_results, weights)
         overall_recommendation = self._determine_recommendation(overall_score, agent_results)
         
         # Extract key insights
@@ -108,18 +451,23 @@ class AgenticShopLab:
             "agent_results": agent_results,
             "key_strengths": strengths,
             "key_concerns": concerns,
-            "confidence": self._calculate_confidence(agent_results)
+            "confidence": self._calculate_confidence(agent_results),
+            "llm_calls_avoided": sum(
+                1 for r in agent_results.values() if r.get("source") == "rules"
+            ),
+            "usage": merge_usage(
+                [r["usage"] for r in agent_results.values() if r.get("usage") and not r.get("shared")],
+                include_rounds=False
+            )
         }
     
-    def _calculate_overall_score(self, agent_results: Dict[str, Dict[str, Any]]) -> int:
-        """Calculate weighted overall score from agent results"""
-        scores = []
-        weights = {
-            "Cost Analysis": 0.25,
-            "Supplier Trust": 0.25,
-            "Sustainability": 0.25,
-            "Ingredient Safety": 0.25
-        }
+    def _calculate_overall_score(
+        self,
+        agent_results: Dict[str, Dict[str, Any]],
+        weights: Optional[Dict[str, float]] = None
+    ) -> int:
+        """Calculate weighted overall score from whichever agents produced results"""
+        weights = weights if weights is not None else self.weights
         
         total_weight = 0
         weighted_sum = 0
@@ -127,7 +475,7 @@ class AgenticShopLab:
         for agent_name, result in agent_results.items():
             if result.get("recommendation") != "error":
                 score = result.get("score", 0)
-                weight = weights.get(agent_name, 0.25)
+                weight = weights.get(agent_name, DEFAULT_AGENT_WEIGHT)
                 weighted_sum += score * weight
                 total_weight += weight
         
@@ -157,10 +505,13 @@ class AgenticShopLab:
         if safety_result.get("recommendation") == "avoid":
             return "avoid"
         
+        # Consensus is two agents, or a majority when fewer than four ran
+        consensus = min(2, (len(agent_results) + 1) // 2)
+        
         # Make decision based on score and agent consensus
-        if overall_score >= 70 and buy_count >= 2:
+        if overall_score >= 70 and buy_count >= consensus:
             return "buy"
-        elif overall_score < 40 or avoid_count >= 2:
+        elif overall_score < 40 or avoid_count >= consensus:
             return "avoid"
         else:
             return "neutral"
@@ -0,0 +1,177 @@
+"""
+Fused execution mode: all agents evaluated in a single structured-output call
+"""
+
+import json
+import time
+from typing import Dict, Any, List, Optional, Callable
+from . import metrics
+from .agents import NO_TOOLS_NOTE, BaseAgent, error_result
+from .usage import new_usage, record_round, split_usage
+
+
+PRODUCT_FIELDS = [
+    ("name", "Product Name"),
+    ("price", "Price"),
+    ("brand", "Brand"),
+    ("category", "Category"),
+    ("description", "Description"),
+    ("ingredients", "Ingredients"),
+    ("reviews", "User Reviews"),
+    ("rating", "Average Rating"),
+]
+
+
+class FusedEvaluator:
+    """
+    Runs several agents' evaluations as one chat completion.
+
+    The agents' system prompts are merged into a single panel prompt and the
+    product description is sent once. The model returns one result object per
+    agent, keyed by agent name, in the same shape as BaseAgent.analyze.
+    """
+
+    def __init__(self, agents: List[BaseAgent], max_tokens: int = 2500):
+        self.agents = agents
+        self.max_tokens = max_tokens
+        self._system_prompts: Dict[tuple, str] = {}
+
+    def _get_system_prompt(self, agents: List[BaseAgent]) -> str:
+        """Merge the agents' system prompts into one panel prompt, cached per agent set"""
+        key = tuple(agent.name for agent in agents)
+        if key in self._system_prompts:
+            return self._system_prompts[key]
+
+        sections = [
+            f"## {agent.name}\n{agent._get_system_prompt().strip()}"
+            for agent in agents
+        ]
+        names = ", ".join(f'"{name}"' for name in key)
+        prompt = (
+            "You are a panel of independent product evaluation experts. "
+            "Evaluate the product separately from each expert perspective below; "
+            "do not let one perspective influence another.\n\n"
+            + "\n\n".join(sections)
+            + "\n\nIMPORTANT: Ignore the per-expert formatting instructions above. "
+            # The fused call sends no tools, so the experts' tool instructions don't apply
+            + NO_TOOLS_NOTE + " "
+            f"Respond in valid JSON format with one key per expert ({names}). "
+            "Each value must be an object with keys: score (0-100), "
+            "recommendation (buy/neutral/avoid), reasoning (string), confidence (0-100)."
+        )
+        self._system_prompts[key] = prompt
+        return prompt
+
+    def _create_prompt(self, product_data: Dict[str, Any], hints: Dict[str, List[str]]) -> str:
+        """Describe the product once for all experts"""
+        lines = ["Evaluate this product:", ""]
+        for field, label in PRODUCT_FIELDS:
+            value = product_data.get(field)
+            if value is None or value == "":
+                value = "Not specified"
+            lines.append(f"{label}: {value}")
+
+        # Hints vary per product, so they go after the static system prefix
+        for name, agent_hints in hints.items():
+            if agent_hints:
+                lines.append("")
+                lines.append(f"Pre-screening notes for {name}:")
+                lines.extend(f"- {hint}" for hint in agent_hints)
+        return "\n".join(lines)
+
+    async def analyze(
+        self,
+        product_data: Dict[str, Any],
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+        agents: Optional[List[BaseAgent]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Evaluate a product with all agents in one completion
+
+        Args:
+            product_data: Product information dictionary
+            progress_callback: Optional callback for progress updates (agent_name, progress)
+            agents: Optional subset of the agents to evaluate with
+
+        Returns:
+            Dictionary mapping agent name to an analyze-compatible result
+        """
+        agents = agents if agents is not None else self.agents
+        results: Dict[str, Dict[str, Any]] = {}
+        hints: Dict[str, List[str]] = {}
+        pending = []
+
+        # Rules are still applied per agent; short-circuited agents drop out of the call
+        for agent in agents:
+            if progress_callback:
+                await progress_callback(agent.name, 0.1)
+            if agent.rule_engine is not None:
+                decision = agent.rule_engine.evaluate(agent.name, product_data)
+                if decision.result is not None:
+                    decision.result["source"] = "rules"
+                    results[agent.name] = decision.result
+                    if progress_callback:
+                        await progress_callback(agent.name, 1.0)
+                    continue
+                hints[agent.name] = decision.hints
+            pending.append(agent)
+
+        if not pending:
+            return {agent.name: results[agent.name] for agent in agents}
+
+        lead = pending[0]
+        usage = new_usage()
+        try:
+            start = time.perf_counter()
+            with metrics.span("fused_completion", model=lead.model):
+                response = await lead.transport.chat_completion(
+                    model=lead.model,
+                    messages=[
+                        {"role": "system", "content": self._get_system_prompt(pending)},
+                        {"role": "user", "content": self._create_prompt(product_data, hints)}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                    max_tokens=self.max_tokens
+                )
+            if getattr(response, "usage", None):
+                details = getattr(response.usage, "prompt_tokens_details", None)
+                record_round(
+                    usage,
+                    "fused_completion",
+                    lead.model,
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    getattr(details, "cached_tokens", None) or 0,
+                    time.perf_counter() - start
+                )
+                # Exported per agent, split the same way as the usage attributed below
+                for agent, share in zip(pending, split_usage(usage, len(pending))):
+                    metrics.registry.record_tokens(
+                        agent.name, lead.model,
+                        share["prompt_tokens"], share["completion_tokens"], share["cached_tokens"]
+                    )
+            content = response.choices[0].message.content or "{}"
+            parsed = json.loads(content)
+        except Exception as e:
+            metrics.registry.record_error("fused_completion", model=lead.model)
+            parsed = {}
+            error = f"Error during fused analysis: {str(e)}"
+        else:
+            error = None
+
+        # The single call's usage is split evenly across the agents it served
+        for agent, agent_usage in zip(pending, split_usage(usage, len(pending))):
+            result = parsed.get(agent.name)
+            if isinstance(result, dict) and "score" in result:
+                result.setdefault("details", {})
+                result["source"] = "llm"
+            else:
+                result = error_result(error or f"Fused response had no result for {agent.name}")
+            result["model"] = lead.model
+            result["usage"] = agent_usage
+            results[agent.name] = result
+            if progress_callback:
+                await progress_callback(agent.name, 1.0)
+
+        return {agent.name: results[agent.name] for agent in agents}
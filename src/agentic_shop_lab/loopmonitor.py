@@ -0,0 +1,163 @@
+"""
+Event-loop health monitoring and blocking-call detection
+
+A heartbeat task wakes every interval and records how late it ran (the loop
+lag). A watchdog thread checks that the heartbeat keeps beating; when the loop
+has been stuck for longer than the threshold, it captures the loop thread's
+stack so the blocking call can be found.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+from . import metrics
+
+
+# Matches frames from this package's modules in formatted stack entries
+PACKAGE_PATH = os.sep + "agentic_shop_lab" + os.sep
+
+
+class BlockingReport:
+    """One stretch of time the event loop was blocked"""
+
+    def __init__(self, duration: float, stack: List[str]):
+        self.duration = duration
+        self.stack = stack
+        self.timestamp = time.time()
+
+    def in_package(self, path: str = PACKAGE_PATH) -> bool:
+        """Check whether the blocked stack passes through a module path"""
+        return any(path in frame for frame in self.stack)
+
+    def format(self) -> str:
+        return (
+            f"Event loop blocked for at least {self.duration * 1000:.0f}ms at:\n"
+            + "".join(self.stack)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "duration_seconds": self.duration,
+            "timestamp": self.timestamp,
+            "stack": self.stack,
+        }
+
+
+def print_report(report: BlockingReport):
+    print(report.format(), file=sys.stderr)
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and reports callbacks that block the loop.
+
+    Lag is exported as the shoplab_event_loop_lag_seconds histogram and the
+    shoplab_event_loop_last_lag_seconds gauge, and blocking stretches increment
+    shoplab_event_loop_blocked_total. These are recorded whenever the monitor
+    runs, independent of metrics.enable(). The most recent blocking reports are
+    kept in memory.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        on_block: Optional[Callable[[BlockingReport], None]] = print_report,
+        max_reports: int = 100
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.on_block = on_block
+        self.reports: deque = deque(maxlen=max_reports)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._beat = 0
+        self._reported_beat = -1
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+        registry = metrics.registry
+        self.lag_gauge = registry.gauge(
+            "shoplab_event_loop_last_lag_seconds",
+            "Most recent delay of the event-loop heartbeat"
+        )
+        self.lag_histogram = registry.histogram(
+            "shoplab_event_loop_lag_seconds",
+            "Delay of the event-loop heartbeat",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+        )
+        self.blocked = registry.counter(
+            "shoplab_event_loop_blocked_total",
+            "Times the event loop was blocked longer than the threshold"
+        )
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """Stop the heartbeat and watchdog"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._last_beat = now
+            self._beat += 1
+            self.lag_gauge.set(lag)
+            self.lag_histogram.observe(lag)
+
+    def _watch(self):
+        # Poll several times per threshold so the stack is caught mid-block
+        poll = max(min(self.threshold / 4, self.interval), 0.005)
+        while not self._stopped.wait(poll):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled < self.threshold or self._reported_beat == self._beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._reported_beat = self._beat
+            report = BlockingReport(stalled, traceback.format_stack(frame))
+            self.reports.append(report)
+            self.blocked.inc()
+            if self.on_block is not None:
+                self.on_block(report)
+
+    def blocking_reports(self, path: Optional[str] = None) -> List[BlockingReport]:
+        """Recorded blocking reports, optionally only those passing through a module path"""
+        return [r for r in self.reports if path is None or r.in_package(path)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "threshold_seconds": self.threshold,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+            "blocking_reports": [r.to_dict() for r in self.reports],
+        }
@@ -0,0 +1,237 @@
+"""
+Lightweight pipeline instrumentation: timing spans, counters and Prometheus export
+
+Instrumentation is off by default. While disabled, span() returns a shared
+no-op context manager and counters are not touched, so the cost is a single
+attribute check per call site.
+"""
+
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[LabelKey, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[_label_key(labels)] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, data in sorted(self.values.items()):
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {data[i]}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {data[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {data[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {data[-1]}")
+        return lines
+
+
+class _NoopSpan:
+    """Shared do-nothing span used while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Times a block, records it in the span histogram and notifies hooks"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.hook_contexts: List[Any] = []
+
+    def __enter__(self):
+        for hook in self.registry.span_hooks:
+            context = hook(self.name, self.labels)
+            if context is not None:
+                context.__enter__()
+                self.hook_contexts.append(context)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.registry.span_duration.observe(elapsed, span=self.name, **self.labels)
+        if exc_type is not None:
+            self.registry.errors.inc(span=self.name, **self.labels)
+        for context in reversed(self.hook_contexts):
+            context.__exit__(exc_type, exc, tb)
+        return False
+
+
+class MetricsRegistry:
+    """Holds all pipeline metrics and renders them in Prometheus text format"""
+
+    def __init__(self):
+        self.enabled = False
+        self.span_hooks: List[Callable[[str, Dict[str, Any]], Any]] = []
+        self.metrics: Dict[str, Any] = {}
+        self.span_duration = self.histogram(
+            "shoplab_span_duration_seconds",
+            "Duration of pipeline phases"
+        )
+        self.errors = self.counter(
+            "shoplab_errors_total",
+            "Errors raised or swallowed in pipeline phases"
+        )
+        self.tokens = self.counter(
+            "shoplab_tokens_total",
+            "LLM tokens by agent, model and kind (prompt, completion, cached)"
+        )
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self.metrics.setdefault(name, Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def span(self, name: str, **labels):
+        """Context manager timing one pipeline phase"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, labels)
+
+    def record_error(self, span: str, **labels):
+        """Count an error that was handled without raising"""
+        if self.enabled:
+            self.errors.inc(span=span, **labels)
+
+    def record_tokens(self, agent: str, model: str, prompt: int, completion: int, cached: int = 0):
+        """Count tokens reported by one completion"""
+        if not self.enabled:
+            return
+        self.tokens.inc(prompt, agent=agent, model=model, kind="prompt")
+        self.tokens.inc(completion, agent=agent, model=model, kind="completion")
+        if cached:
+            self.tokens.inc(cached, agent=agent, model=model, kind="cached")
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def enable(opentelemetry: bool = False):
+    """
+    Turn instrumentation on
+
+    Args:
+        opentelemetry: Also emit every span as an OpenTelemetry span (requires
+            the opentelemetry-api package and a configured tracer provider)
+    """
+    registry.enabled = True
+    if opentelemetry:
+        from opentelemetry import trace
+
+        tracer = trace.get_tracer("agentic_shop_lab")
+        add_span_hook(lambda name, labels: tracer.start_as_current_span(
+            name, attributes={k: str(v) for k, v in labels.items()}
+        ))
+
+
+def disable():
+    """Turn instrumentation off"""
+    registry.enabled = False
+
+
+def add_span_hook(hook: Callable[[str, Dict[str, Any]], Any]):
+    """
+    Register a hook called at the start of every span
+
+    The hook receives the span name and labels and may return a context
+    manager, which is entered for the duration of the span.
+    """
+    registry.span_hooks.append(hook)
+
+
+def span(name: str, **labels):
+    """Context manager timing one pipeline phase in the default registry"""
+    return registry.span(name, **labels)
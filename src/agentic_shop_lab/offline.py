@@ -0,0 +1,235 @@
+"""
+Offline provider-batch mode for non-urgent evaluations
+
+Export turns a catalog into batch-request JSONL files for the provider's
+asynchronous batch API, one request per product and agent, using the messages
+and parameters BaseAgent.analyze sends on its first completion. Tool round
+trips cannot happen offline, so requests are sent with tool_choice="none" and
+a note telling the model to answer from the product data alone.
+Import parses the returned outputs with the agents' own result parsing and
+aggregates them with AgenticShopLab.
+
+Usage:
+    python -m agentic_shop_lab.offline export products.jsonl batch_requests/
+    python -m agentic_shop_lab.offline import products.jsonl results.jsonl batch_output.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+from .framework import AgenticShopLab
+from .agents import NO_TOOLS_NOTE, error_result
+from .catalog import iter_products
+from .rules import RuleEngine
+from .usage import new_usage, record_round
+
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# The provider's batch API accepts at most this many requests per input file
+MAX_REQUESTS_PER_FILE = 50000
+
+# Appended to each exported prompt
+OFFLINE_NOTE = "\n\n" + NO_TOOLS_NOTE
+
+
+def make_custom_id(index: int, agent_name: str) -> str:
+    """Request ID linking a batch output line back to a catalog line and agent"""
+    return f"{index}:{agent_name}"
+
+
+def split_custom_id(custom_id: str) -> Tuple[int, str]:
+    index, agent_name = custom_id.split(":", 1)
+    return int(index), agent_name
+
+
+def _settle_with_rules(agent, product_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Apply an agent's rules, returning a definitive result or prompt hints"""
+    if agent.rule_engine is None:
+        return None, []
+    decision = agent.rule_engine.evaluate(agent.name, product_data)
+    if decision.result is not None:
+        decision.result["source"] = "rules"
+    return decision.result, decision.hints
+
+
+def export_batch_requests(
+    catalog_path: str,
+    output_dir: str,
+    framework: AgenticShopLab,
+    max_requests_per_file: int = MAX_REQUESTS_PER_FILE
+) -> List[str]:
+    """
+    Write batch-request JSONL files for every product and agent in a catalog
+
+    Agents whose rules settle a product need no request and are skipped; the
+    import step re-applies the same rules.
+
+    Returns:
+        Paths of the files written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths: List[str] = []
+    out = None
+    written = 0
+
+    try:
+        for index, product in iter_products(catalog_path):
+            for agent in framework.agents:
+                result, hints = _settle_with_rules(agent, product)
+                if result is not None:
+                    continue
+
+                if out is None or written >= max_requests_per_file:
+                    if out is not None:
+                        out.close()
+                    path = os.path.join(output_dir, f"batch-{len(paths) + 1:04d}.jsonl")
+                    out = open(path, "w", encoding="utf-8")
+                    paths.append(path)
+                    written = 0
+
+                messages = agent.build_messages(product, hints)
+                messages[-1]["content"] += OFFLINE_NOTE
+                body = agent.request_params(agent.model, messages)
+                if "tools" in body:
+                    body["tool_choice"] = "none"
+                out.write(json.dumps({
+                    "custom_id": make_custom_id(index, agent.name),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": body
+                }) + "\n")
+                written += 1
+    finally:
+        if out is not None:
+            out.close()
+
+    return paths
+
+
+def parse_batch_output(agent, line: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one provider batch output line into an analyze-compatible result"""
+    response = line.get("response") or {}
+    error = line.get("error") or (
+        response.get("body", {}).get("error") if response.get("status_code", 200) != 200 else None
+    )
+    if error:
+        message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        return error_result(f"Error during analysis: {message}")
+
+    body = response.get("body", {})
+    message = body["choices"][0]["message"]
+    if message.get("tool_calls") and not message.get("content"):
+        # Tool round trips need live calls; offline mode only has the first completion
+        names = ", ".join(call["function"]["name"] for call in message["tool_calls"])
+        return error_result(f"Model requested {names}, which offline batch mode cannot run")
+
+    result, _ = agent.parse_content(message.get("content"))
+    result["source"] = "llm"
+    result["model"] = body.get("model", agent.model)
+    if body.get("usage"):
+        details = body["usage"].get("prompt_tokens_details") or {}
+        result["usage"] = new_usage()
+        record_round(
+            result["usage"],
+            "batch_completion",
+            result["model"],
+            body["usage"].get("prompt_tokens", 0),
+            body["usage"].get("completion_tokens", 0),
+            details.get("cached_tokens") or 0,
+            0.0
+        )
+    return result
+
+
+def import_batch_results(
+    catalog_path: str,
+    output_paths: List[str],
+    results_path: str,
+    framework: AgenticShopLab
+) -> Dict[str, int]:
+    """
+    Parse provider batch outputs and write aggregated evaluations as JSONL
+
+    Args:
+        catalog_path: The catalog the requests were exported from
+        output_paths: Provider batch output files
+        results_path: JSONL file to write one evaluation per product to
+        framework: Framework whose agents and aggregation are used
+
+    Returns:
+        Counts of products written and agent outputs that were missing
+    """
+    agents = {agent.name: agent for agent in framework.agents}
+    outputs: Dict[str, Dict[str, Any]] = {}
+    for path in output_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                line = json.loads(raw)
+                _, agent_name = split_custom_id(line["custom_id"])
+                if agent_name in agents:
+                    outputs[line["custom_id"]] = parse_batch_output(agents[agent_name], line)
+
+    counts = {"products": 0, "missing": 0}
+    with open(results_path, "w", encoding="utf-8") as out:
+        for index, product in iter_products(catalog_path):
+            agent_results = {}
+            for agent in framework.agents:
+                result, _ = _settle_with_rules(agent, product)
+                if result is None:
+                    result = outputs.pop(make_custom_id(index, agent.name), None)
+                if result is None:
+                    counts["missing"] += 1
+                    result = error_result("No batch output for this agent")
+                agent_results[agent.name] = result
+
+            out.write(json.dumps({
+                "index": index,
+                "id": product.get("id"),
+                "name": product.get("name"),
+                "result": framework._compile_results(agent_results)
+            }) + "\n")
+            counts["products"] += 1
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline provider-batch export and import")
+    parser.add_argument("--rules", help="Pre-scoring rules file (use the same one for export and import)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write batch-request JSONL files")
+    export_parser.add_argument("catalog", help="JSONL or CSV file of products")
+    export_parser.add_argument("output_dir", help="Directory for batch-request files")
+    export_parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS_PER_FILE,
+                               help="Maximum requests per file")
+
+    import_parser = subparsers.add_parser("import", help="Aggregate batch outputs into evaluations")
+    import_parser.add_argument("catalog", help="The catalog the requests were exported from")
+    import_parser.add_argument("results", help="JSONL file to write evaluations to")
+    import_parser.add_argument("outputs", nargs="+", help="Provider batch output files")
+
+    args = parser.parse_args(argv)
+    framework = AgenticShopLab(
+        rule_engine=RuleEngine.from_file(args.rules) if args.rules else None
+    )
+
+    if args.command == "export":
+        paths = export_batch_requests(args.catalog, args.output_dir, framework, args.max_requests)
+        print(f"Wrote {len(paths)} batch-request file(s) to {args.output_dir}", file=sys.stderr)
+    else:
+        counts = import_batch_results(args.catalog, args.outputs, args.results, framework)
+        print(
+            f"Wrote {counts['products']} evaluations to {args.results} "
+            f"({counts['missing']} agent outputs missing)",
+            file=sys.stderr
+        )
+
+
+if __name__ == "__main__":
+    main()
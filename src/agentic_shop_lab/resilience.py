@@ -0,0 +1,171 @@
+"""
+Circuit breakers and hedged requests for the agents' tool dependencies
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable
+from . import metrics
+from .transport import TransportError
+
+
+HEDGED_REQUESTS = metrics.registry.counter(
+    "shoplab_hedged_requests_total",
+    "Backup attempts started for slow or failed tool requests"
+)
+
+
+class CircuitOpenError(TransportError):
+    """A call was rejected because its dependency's breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is unhealthy.
+
+    After failure_threshold consecutive failures the breaker opens and rejects
+    calls for reset_timeout seconds. It then lets a single trial call through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+
+        registry = metrics.registry
+        self.state_gauge = registry.gauge(
+            "shoplab_circuit_open",
+            "Whether a dependency's circuit breaker is open (1) or closed (0)"
+        )
+        self.rejections = registry.counter(
+            "shoplab_circuit_rejections_total",
+            "Calls rejected by an open circuit breaker"
+        )
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected, including while a trial call is running"""
+        state = self.state
+        return state == self.OPEN or (state == self.HALF_OPEN and self.trial_in_flight)
+
+    def allow(self) -> bool:
+        """Check whether a call may go ahead, claiming the trial slot when half-open"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        if metrics.registry.enabled:
+            self.rejections.inc(dependency=self.name)
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        if metrics.registry.enabled:
+            self.state_gauge.set(0, dependency=self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if metrics.registry.enabled:
+                self.state_gauge.set(1, dependency=self.name)
+        self.trial_in_flight = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected_calls": self.rejected,
+        }
+
+
+async def hedged(
+    call: Callable[[], Awaitable[Any]],
+    delay: float,
+    max_attempts: int = 2,
+    name: str = ""
+) -> Any:
+    """
+    Run a call, starting a backup attempt whenever it is still pending after delay
+
+    The first attempt to succeed wins and the others are cancelled. Failed
+    attempts do not end the call while others are still running; if every
+    attempt fails, the last error is raised.
+    """
+    pending = {asyncio.ensure_future(call())}
+    started = 1
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            timeout = delay if started < max_attempts else None
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if started < max_attempts and (not done or not pending):
+                # Still slow (or the only attempt failed): start a backup
+                if metrics.registry.enabled:
+                    HEDGED_REQUESTS.inc(dependency=name)
+                pending.add(asyncio.ensure_future(call()))
+                started += 1
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def guarded_call(
+    call: Callable[[], Awaitable[Any]],
+    breaker: Optional[CircuitBreaker] = None,
+    hedge_delay: Optional[float] = None
+) -> Any:
+    """
+    Call a dependency through its circuit breaker, optionally hedged
+
+    Raises:
+        CircuitOpenError: If the breaker is open
+    """
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"{breaker.name} is unavailable (circuit open)")
+    name = breaker.name if breaker is not None else ""
+    try:
+        if hedge_delay:
+            result = await hedged(call, hedge_delay, name=name)
+        else:
+            result = await call()
+    except asyncio.CancelledError:
+        if breaker is not None:
+            breaker.trial_in_flight = False
+        raise
+    except Exception:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    if breaker is not None:
+        breaker.record_success()
+    return result
@@ -0,0 +1,178 @@
+"""
+Deterministic pre-scoring rules that run before the LLM agents
+"""
+
+import json
+from typing import Dict, Any, List, Optional
+
+
+class Rule:
+    """A single declarative rule loaded from a rules file"""
+
+    OPERATORS = ("missing", "equals", "contains_any", "lt", "gt")
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec.get("name", "unnamed")
+        self.agents = spec.get("agents") or []
+        self.conditions = spec.get("when") or []
+        self.result = spec.get("result")
+        self.hint = spec.get("hint")
+
+        if self.result is None and self.hint is None:
+            raise ValueError(f"Rule '{self.name}' needs either a 'result' or a 'hint'")
+        for condition in self.conditions:
+            if "field" not in condition:
+                raise ValueError(f"Rule '{self.name}' has a condition without a 'field'")
+            if not any(op in condition for op in self.OPERATORS):
+                raise ValueError(
+                    f"Rule '{self.name}' condition on '{condition['field']}' "
+                    f"needs one of: {', '.join(self.OPERATORS)}"
+                )
+        # Rendered once here so a bad template fails at load, not per product
+        templates = [("hint", self.hint)] if self.hint is not None else []
+        if self.result is not None and "reasoning" in self.result:
+            templates.append(("reasoning", self.result["reasoning"]))
+        for field, template in templates:
+            try:
+                str(template).format(matched="")
+            except (KeyError, IndexError, AttributeError, ValueError) as e:
+                raise ValueError(
+                    f"Rule '{self.name}' {field} may only use the {{matched}} "
+                    f"placeholder (write literal braces as {{{{ and }}}}): {e!r}"
+                )
+
+    def applies_to(self, agent_name: str) -> bool:
+        """Check whether this rule is scoped to the given agent"""
+        return not self.agents or agent_name in self.agents
+
+    def match(self, product_data: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Match the rule against product data
+
+        Returns:
+            List of matched terms (possibly empty) if every condition holds,
+            otherwise None
+        """
+        matched = []
+        for condition in self.conditions:
+            terms = self._match_condition(condition, product_data)
+            if terms is None:
+                return None
+            matched.extend(terms)
+        return matched
+
+    def _match_condition(
+        self,
+        condition: Dict[str, Any],
+        product_data: Dict[str, Any]
+    ) -> Optional[List[str]]:
+        """Evaluate a single condition, returning matched terms or None"""
+        value = product_data.get(condition["field"])
+        is_missing = value is None or (isinstance(value, str) and not value.strip())
+
+        if "missing" in condition:
+            return [] if is_missing == bool(condition["missing"]) else None
+        if is_missing:
+            return None
+
+        if "equals" in condition:
+            expected = condition["equals"]
+            if isinstance(value, str) and isinstance(expected, str):
+                return [value] if value.strip().lower() == expected.lower() else None
+            return [str(value)] if value == expected else None
+
+        if "contains_any" in condition:
+            haystack = str(value).lower()
+            found = [term for term in condition["contains_any"] if term.lower() in haystack]
+            return found or None
+
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if "lt" in condition and not number < condition["lt"]:
+            return None
+        if "gt" in condition and not number > condition["gt"]:
+            return None
+        return [str(value)]
+
+    def build_result(self, matched: List[str]) -> Dict[str, Any]:
+        """Build an analyze-compatible result for a definitive rule"""
+        reasoning = str(self.result.get("reasoning", f"Matched rule '{self.name}'"))
+        return {
+            "score": int(self.result.get("score", 0)),
+            "recommendation": self.result.get("recommendation", "neutral"),
+            "reasoning": reasoning.format(matched=", ".join(matched)),
+            "confidence": int(self.result.get("confidence", 100)),
+            "details": dict(self.result.get("details", {}), rule=self.name),
+        }
+
+    def build_hint(self, matched: List[str]) -> str:
+        """Render the hint text for a hint rule"""
+        return str(self.hint).format(matched=", ".join(matched))
+
+
+class RuleDecision:
+    """Outcome of running the rule layer for one agent and product"""
+
+    def __init__(self, result: Optional[Dict[str, Any]] = None, hints: Optional[List[str]] = None):
+        self.result = result
+        self.hints = hints or []
+
+
+class RuleEngine:
+    """
+    Pluggable rule layer evaluated before each agent's LLM call.
+
+    Definitive rules return a result directly and skip the LLM; hint rules
+    add pre-screening notes to the agent prompt. Rules are evaluated in file
+    order and the first definitive match wins.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules = rules or []
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RuleEngine":
+        """Build an engine from a parsed rules document"""
+        return cls([Rule(spec) for spec in data.get("rules", [])])
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        """Load rules from a JSON rules file"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def evaluate(self, agent_name: str, product_data: Dict[str, Any]) -> RuleDecision:
+        """Run all rules scoped to an agent against the product data"""
+        hints = []
+        for rule in self.rules:
+            if not rule.applies_to(agent_name):
+                continue
+            matched = rule.match(product_data)
+            if matched is None:
+                continue
+            if rule.result is not None:
+                self._count(agent_name, "short_circuited")
+                return RuleDecision(result=rule.build_result(matched))
+            hints.append(rule.build_hint(matched))
+
+        self._count(agent_name, "hinted" if hints else "passed")
+        return RuleDecision(hints=hints)
+
+    def _count(self, agent_name: str, outcome: str):
+        """Increment the outcome counter for an agent"""
+        counts = self.counters.setdefault(
+            agent_name,
+            {"short_circuited": 0, "hinted": 0, "passed": 0}
+        )
+        counts[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-agent rule outcomes and the number of LLM calls avoided"""
+        return {
+            "rules": len(self.rules),
+            "agents": {name: counts.copy() for name, counts in self.counters.items()},
+            "llm_calls_avoided": sum(c["short_circuited"] for c in self.counters.values()),
+        }
@@ -0,0 +1,183 @@
+"""
+Helpers for streamed completions: incremental JSON parsing and token-driven progress
+"""
+
+import json
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parses a streamed top-level JSON object.
+
+    Text is fed in arbitrary chunks; each call to feed returns the top-level
+    fields whose values completed within that chunk, so early keys such as
+    score and recommendation are available before later keys finish streaming.
+    """
+
+    # Parser states
+    EXPECT_OBJECT = 0
+    EXPECT_KEY = 1
+    IN_KEY = 2
+    EXPECT_COLON = 3
+    EXPECT_VALUE = 4
+    IN_STRING = 5
+    IN_SCALAR = 6
+    IN_NESTED = 7
+    EXPECT_COMMA = 8
+    DONE = 9
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._state = self.EXPECT_OBJECT
+        self._key = ""
+        self._value = ""
+        self._escape = False
+        self._depth = 0
+        self._nested_in_string = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Feed the next chunk of streamed text
+
+        Returns:
+            List of (key, value) pairs completed by this chunk
+        """
+        completed = []
+        for char in text:
+            field = self._step(char)
+            if field is not None:
+                completed.append(field)
+        return completed
+
+    def _step(self, char: str) -> Optional[Tuple[str, Any]]:
+        """Advance the state machine by one character"""
+        state = self._state
+
+        if state == self.EXPECT_OBJECT:
+            if char == "{":
+                self._state = self.EXPECT_KEY
+        elif state == self.EXPECT_KEY:
+            if char == '"':
+                self._key = ""
+                self._state = self.IN_KEY
+            elif char == "}":
+                self._state = self.DONE
+        elif state == self.IN_KEY:
+            if self._escape:
+                self._key += char
+                self._escape = False
+            elif char == "\\":
+                self._key += char
+                self._escape = True
+            elif char == '"':
+                self._key = json.loads(f'"{self._key}"')
+                self._state = self.EXPECT_COLON
+            else:
+                self._key += char
+        elif state == self.EXPECT_COLON:
+            if char == ":":
+                self._state = self.EXPECT_VALUE
+        elif state == self.EXPECT_VALUE:
+            if char.isspace():
+                return None
+            self._value = char
+            if char == '"':
+                self._state = self.IN_STRING
+            elif char in "{[":
+                self._depth = 1
+                self._nested_in_string = False
+                self._state = self.IN_NESTED
+            else:
+                self._state = self.IN_SCALAR
+        elif state == self.IN_STRING:
+            self._value += char
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                return self._complete(self.EXPECT_COMMA)
+        elif state == self.IN_NESTED:
+            self._value += char
+            if self._escape:
+                self._escape = False
+            elif self._nested_in_string:
+                if char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._nested_in_string = False
+            elif char == '"':
+                self._nested_in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self._complete(self.EXPECT_COMMA)
+        elif state == self.IN_SCALAR:
+            if char in ",}" or char.isspace():
+                field = self._complete(self.EXPECT_COMMA)
+                self._step(char)
+                return field
+            self._value += char
+        elif state == self.EXPECT_COMMA:
+            if char == ",":
+                self._state = self.EXPECT_KEY
+            elif char == "}":
+                self._state = self.DONE
+        return None
+
+    def _complete(self, next_state: int) -> Optional[Tuple[str, Any]]:
+        """Finish the current value and record it as a field"""
+        self._state = next_state
+        try:
+            value = json.loads(self._value)
+        except json.JSONDecodeError:
+            return None
+        self.fields[self._key] = value
+        return self._key, value
+
+
+class StreamProgress:
+    """
+    Maps streamed completion tokens onto a progress range.
+
+    Progress advances with the number of tokens received relative to an
+    expected completion length and never moves backwards.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[float], Any]],
+        expected_tokens: int = 300,
+        step: float = 0.02
+    ):
+        self.callback = callback
+        self.expected_tokens = expected_tokens
+        self.step = step
+        self.current = 0.0
+        self._start = 0.0
+        self._end = 1.0
+        self._tokens = 0
+
+    def begin(self, start: float, end: float):
+        """Start a new completion that moves progress from start towards end"""
+        self._start = max(start, self.current)
+        self._end = end
+        self._tokens = 0
+
+    async def advance(self, tokens: int = 1):
+        """Record received tokens and report progress when it moved enough"""
+        self._tokens += tokens
+        fraction = min(self._tokens / self.expected_tokens, 1.0)
+        await self.set(self._start + (self._end - self._start) * fraction)
+
+    async def set(self, progress: float, force: bool = False):
+        """Report progress if it moved forward by at least one step"""
+        if progress < self.current:
+            return
+        if force or progress - self.current >= self.step:
+            self.current = progress
+            if self.callback:
+                await self.callback(progress)
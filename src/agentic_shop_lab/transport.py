@@ -0,0 +1,448 @@
+"""
+Pluggable transports for the agents' external calls
+
+Every call an agent makes to the outside world (chat completions, Tavily web
+searches and OpenFoodFacts lookups) goes through a Transport:
+
+- LiveTransport sends calls to the real services (the default)
+- RecordingTransport wraps another transport and appends every exchange to a
+  JSONL fixture file
+- ReplayTransport answers calls from a fixture file, deterministically
+- FakeTransport synthesizes responses with configurable latency and error
+  rates, for load tests and benchmarks without API keys
+
+Completion responses handed back by the recording, replay and fake transports
+are attribute-accessible namespaces shaped like the OpenAI SDK objects, so the
+agents treat them exactly like live responses.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator
+
+
+class TransportError(Exception):
+    """A tool backend or fake/replayed call failed"""
+
+
+class Transport:
+    """Interface for the agents' external calls"""
+
+    async def chat_completion(self, **kwargs) -> Any:
+        """
+        Create a chat completion
+
+        Takes the same keyword arguments as AsyncOpenAI.chat.completions.create.
+        With stream=True the result is an async iterator of chunks.
+        """
+        raise NotImplementedError
+
+    async def search(self, query: str) -> Dict[str, Any]:
+        """Run a Tavily web search and return the raw response"""
+        raise NotImplementedError
+
+    async def get_json(self, url: str, timeout: float = 10) -> Dict[str, Any]:
+        """Fetch a JSON document over HTTP, raising TransportError on failure"""
+        raise NotImplementedError
+
+
+class LiveTransport(Transport):
+    """
+    Sends calls to OpenAI, Tavily and plain HTTP endpoints.
+
+    The SDK clients (and the openai and tavily modules) are only loaded on
+    first use, so constructing agents stays cheap at startup.
+    """
+
+    def __init__(self, client=None, tavily_client=None):
+        self._client = client
+        self._tavily_client = tavily_client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def tavily_client(self):
+        if self._tavily_client is None:
+            from tavily import TavilyClient
+
+            self._tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        return self._tavily_client
+
+    @tavily_client.setter
+    def tavily_client(self, tavily_client):
+        self._tavily_client = tavily_client
+
+    async def chat_completion(self, **kwargs) -> Any:
+        return await self.client.chat.completions.create(**kwargs)
+
+    async def search(self, query: str) -> Dict[str, Any]:
+        # The Tavily client is synchronous; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.tavily_client.search, query)
+
+    async def get_json(self, url: str, timeout: float = 10) -> Dict[str, Any]:
+        import requests
+
+        def fetch():
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, fetch)
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+
+
+def to_plain(obj: Any) -> Any:
+    """Convert SDK objects and namespaces into JSON-serializable data"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, SimpleNamespace):
+        return {k: to_plain(v) for k, v in vars(obj).items()}
+    if isinstance(obj, dict):
+        return {k: to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_plain(v) for v in obj]
+    return obj
+
+
+def to_namespace(data: Any) -> Any:
+    """Convert plain data back into attribute-accessible response objects"""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [to_namespace(v) for v in data]
+    return data
+
+
+def exchange_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable key identifying a request in a fixture file"""
+    canonical = json.dumps({"kind": kind, **request}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def _completion_request(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    # Usage reporting options do not change the answer
+    return {k: v for k, v in kwargs.items() if k != "stream_options"}
+
+
+class RecordingTransport(Transport):
+    """
+    Records every exchange of an inner transport to a JSONL fixture file.
+
+    Each line holds the exchange kind, its key, the request and either the
+    response, the list of stream chunks or the error message.
+    """
+
+    def __init__(self, inner: Transport, path: str):
+        self.inner = inner
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _write(self, kind: str, request: Dict[str, Any], **outcome):
+        entry = {"kind": kind, "key": exchange_key(kind, request), "request": request, **outcome}
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    async def _record(self, kind: str, request: Dict[str, Any], call) -> Any:
+        try:
+            result = await call
+        except Exception as e:
+            self._write(kind, request, error=str(e))
+            raise
+        self._write(kind, request, response=to_plain(result))
+        return result
+
+    async def chat_completion(self, **kwargs) -> Any:
+        request = _completion_request(kwargs)
+        if not kwargs.get("stream"):
+            return await self._record("chat_completion", request, self.inner.chat_completion(**kwargs))
+
+        try:
+            stream = await self.inner.chat_completion(**kwargs)
+        except Exception as e:
+            self._write("chat_completion", request, error=str(e))
+            raise
+        return self._record_stream(request, stream)
+
+    async def _record_stream(self, request: Dict[str, Any], stream) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append(to_plain(chunk))
+            yield chunk
+        self._write("chat_completion", request, chunks=chunks)
+
+    async def search(self, query: str) -> Dict[str, Any]:
+        return await self._record("search", {"query": query}, self.inner.search(query))
+
+    async def get_json(self, url: str, timeout: float = 10) -> Dict[str, Any]:
+        return await self._record("get_json", {"url": url}, self.inner.get_json(url, timeout))
+
+
+class ReplayTransport(Transport):
+    """
+    Answers calls from a fixture file written by RecordingTransport.
+
+    A request recorded several times is answered with its recordings in turn,
+    cycling when they run out. Requests that were never recorded raise
+    TransportError, or go to the fallback transport if one is given.
+    """
+
+    def __init__(self, path: str, fallback: Optional[Transport] = None):
+        self.path = path
+        self.fallback = fallback
+        self.exchanges: Dict[str, List[Dict[str, Any]]] = {}
+        self.positions: Dict[str, int] = {}
+        self.misses = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.exchanges.setdefault(entry["key"], []).append(entry)
+
+    def _next(self, kind: str, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = exchange_key(kind, request)
+        entries = self.exchanges.get(key)
+        if not entries:
+            self.misses += 1
+            if self.fallback is None:
+                raise TransportError(f"No recorded {kind} exchange for this request (key {key})")
+            return None
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        entry = entries[position % len(entries)]
+        if "error" in entry:
+            raise TransportError(entry["error"])
+        return entry
+
+    async def chat_completion(self, **kwargs) -> Any:
+        entry = self._next("chat_completion", _completion_request(kwargs))
+        if entry is None:
+            return await self.fallback.chat_completion(**kwargs)
+        if "chunks" in entry:
+            return _iterate([to_namespace(chunk) for chunk in entry["chunks"]])
+        return to_namespace(entry["response"])
+
+    async def search(self, query: str) -> Dict[str, Any]:
+        entry = self._next("search", {"query": query})
+        if entry is None:
+            return await self.fallback.search(query)
+        return entry["response"]
+
+    async def get_json(self, url: str, timeout: float = 10) -> Dict[str, Any]:
+        entry = self._next("get_json", {"url": url})
+        if entry is None:
+            return await self.fallback.get_json(url, timeout)
+        return entry["response"]
+
+
+async def _iterate(items: List[Any], delay: float = 0.0) -> AsyncIterator[Any]:
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+# Fused prompts end with the list of expert names the response must be keyed by
+FUSED_KEYS_PATTERN = re.compile(r"one key per expert \(([^)]*)\)")
+
+
+def fake_result(seed_text: str) -> Dict[str, Any]:
+    """Deterministic agent result derived from the request text"""
+    digest = hashlib.sha256(seed_text.encode("utf-8")).digest()
+    score = 20 + digest[0] % 76
+    recommendation = "buy" if score >= 70 else "avoid" if score < 40 else "neutral"
+    return {
+        "score": score,
+        "recommendation": recommendation,
+        "reasoning": f"Synthetic evaluation (score {score})",
+        "confidence": 50 + digest[1] % 50,
+        "details": {}
+    }
+
+
+def default_responder(kwargs: Dict[str, Any]) -> str:
+    """
+    Build fake completion content for a request
+
+    Fused requests get one result per expert name found in the system prompt;
+    everything else gets a single agent result.
+    """
+    messages = kwargs.get("messages", [])
+    text = "\n".join(str(m.get("content") or "") for m in messages)
+    system = str(messages[0].get("content") or "") if messages else ""
+    match = FUSED_KEYS_PATTERN.search(system)
+    if match:
+        names = re.findall(r'"([^"]+)"', match.group(1))
+        return json.dumps({name: fake_result(name + text) for name in names})
+    return json.dumps(fake_result(text))
+
+
+class FakeTransport(Transport):
+    """
+    Synthetic backend for load tests.
+
+    Latencies are drawn from a log-normal distribution with the given median
+    (in seconds) and sigma; each call fails with the configured error rate.
+    The first completion of an agent calls the first offered tool with
+    probability tool_call_rate, so tool round trips are exercised too. With a seed, the
+    sequence of latencies, errors and tool calls is reproducible.
+    """
+
+    def __init__(
+        self,
+        llm_latency: float = 0.8,
+        tool_latency: float = 0.3,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        tool_error_rate: float = 0.0,
+        tool_call_rate: float = 0.0,
+        prompt_tokens: int = 900,
+        completion_tokens: int = 120,
+        seed: Optional[int] = None,
+        responder: Callable[[Dict[str, Any]], str] = default_responder
+    ):
+        self.llm_latency = llm_latency
+        self.tool_latency = tool_latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.tool_error_rate = tool_error_rate
+        self.tool_call_rate = tool_call_rate
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.responder = responder
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def _latency(self, median: float) -> float:
+        if median <= 0:
+            return 0.0
+        return self.random.lognormvariate(0.0, self.latency_sigma) * median
+
+    async def _wait(self, median: float, error_rate: float, what: str):
+        self.calls += 1
+        delay = self._latency(median)
+        failed = self.random.random() < error_rate
+        await asyncio.sleep(delay)
+        if failed:
+            raise TransportError(f"Injected {what} failure")
+
+    def _response(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": None, "tool_calls": None}
+        wants_tool = (
+            kwargs.get("tool_choice") == "auto"
+            and self.random.random() < self.tool_call_rate
+        )
+        if wants_tool:
+            # Call the first tool offered, with the prompt's first line as its argument
+            user = str(kwargs["messages"][-1].get("content") or "")
+            query = next((line.strip() for line in user.splitlines() if line.strip()), "product")[:80]
+            name = kwargs["tools"][0]["function"]["name"]
+            arguments = {"query": query} if name == "web_search" else {"product_name": query}
+            message["tool_calls"] = [{
+                "id": f"call_{self.calls}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)}
+            }]
+        else:
+            message["content"] = self.responder(kwargs)
+        return {
+            "model": kwargs.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0}
+            }
+        }
+
+    async def chat_completion(self, **kwargs) -> Any:
+        stream = kwargs.get("stream")
+        # Streams pay a tenth of the latency up front and the rest across chunks
+        await self._wait(self.llm_latency / 10 if stream else self.llm_latency, self.error_rate, "completion")
+        response = self._response(kwargs)
+        if not stream:
+            return to_namespace(response)
+        chunks = _stream_chunks(response)
+        return _iterate(chunks, self._latency(self.llm_latency) * 0.9 / len(chunks))
+
+    async def search(self, query: str) -> Dict[str, Any]:
+        await self._wait(self.tool_latency, self.tool_error_rate, "web search")
+        return {"results": [{
+            "title": f"Result for {query}",
+            "content": f"Synthetic search content about {query}.",
+            "url": "https://example.com/search"
+        }]}
+
+    async def get_json(self, url: str, timeout: float = 10) -> Dict[str, Any]:
+        await self._wait(self.tool_latency, self.tool_error_rate, "HTTP")
+        return {"products": []}
+
+
+def _stream_chunks(response: Dict[str, Any], pieces: int = 8) -> List[Any]:
+    """Split a fake response into stream chunks, ending with a usage-only chunk"""
+    message = response["choices"][0]["message"]
+    deltas = []
+    if message["tool_calls"]:
+        for index, call in enumerate(message["tool_calls"]):
+            deltas.append({"content": None, "tool_calls": [{
+                "index": index,
+                "id": call["id"],
+                "function": {"name": call["function"]["name"], "arguments": call["function"]["arguments"]}
+            }]})
+    else:
+        content = message["content"]
+        size = max(1, -(-len(content) // pieces))
+        for start in range(0, len(content), size):
+            deltas.append({"content": content[start:start + size], "tool_calls": None})
+
+    chunks = [
+        to_namespace({"choices": [{"index": 0, "delta": delta}], "usage": None})
+        for delta in deltas
+    ]
+    chunks.append(to_namespace({"choices": [], "usage": response["usage"]}))
+    return chunks
+
+
+def transport_from_spec(spec: str, live: Optional[Transport] = None) -> Optional[Transport]:
+    """
+    Build a transport from a short spec string
+
+    Specs:
+        live               Real services (returns None: agents keep their own)
+        fake               FakeTransport with default settings
+        record:<path>      Calls to the live transport, recorded to a fixture file
+        replay:<path>      Answers from a fixture file
+    """
+    kind, _, path = spec.partition(":")
+    if kind == "live":
+        return None
+    if kind == "fake":
+        return FakeTransport()
+    if kind == "record" and path:
+        if live is None:
+            raise ValueError("Recording needs a live transport to wrap")
+        return RecordingTransport(live, path)
+    if kind == "replay" and path:
+        return ReplayTransport(path)
+    raise ValueError(f"Unknown transport spec '{spec}'")
@@ -0,0 +1,163 @@
+"""
+Token and cost accounting for LLM rounds, agents, evaluations and tenants
+"""
+
+from typing import Dict, Any, List, Optional
+
+
+# USD per 1M tokens (input, output)
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+# Cached prompt tokens are billed at this fraction of the input price
+CACHED_INPUT_DISCOUNT = 0.5
+
+TOKEN_KEYS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+COUNT_KEYS = TOKEN_KEYS + ("llm_calls", "tool_calls")
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0
+) -> float:
+    """Estimate the USD cost of a completion, 0.0 for unknown models"""
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    uncached = prompt_tokens - cached_tokens
+    return (
+        uncached * input_price
+        + cached_tokens * input_price * CACHED_INPUT_DISCOUNT
+        + completion_tokens * output_price
+    ) / 1_000_000
+
+
+def new_usage() -> Dict[str, Any]:
+    """Empty usage record for one agent run"""
+    return {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "llm_calls": 0,
+        "tool_calls": 0,
+        "cost_usd": 0.0,
+        "latency_seconds": 0.0,
+        "rounds": []
+    }
+
+
+def record_round(
+    usage: Dict[str, Any],
+    phase: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int,
+    latency: float
+):
+    """Add one LLM round to a usage record"""
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+    usage["prompt_tokens"] += prompt_tokens
+    usage["completion_tokens"] += completion_tokens
+    usage["cached_tokens"] += cached_tokens
+    usage["llm_calls"] += 1
+    usage["cost_usd"] += cost
+    usage["latency_seconds"] += latency
+    usage["rounds"].append({
+        "phase": phase,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "cost_usd": cost,
+        "latency_seconds": latency
+    })
+
+
+def merge_usage(records: List[Dict[str, Any]], include_rounds: bool = True) -> Dict[str, Any]:
+    """Sum several usage records into one"""
+    total = new_usage()
+    for record in records:
+        for key in COUNT_KEYS:
+            total[key] += record.get(key, 0)
+        total["cost_usd"] += record.get("cost_usd", 0.0)
+        total["latency_seconds"] += record.get("latency_seconds", 0.0)
+        if include_rounds:
+            total["rounds"].extend(record.get("rounds", []))
+    if not include_rounds:
+        del total["rounds"]
+    return total
+
+
+def split_usage(usage: Dict[str, Any], parts: int) -> List[Dict[str, Any]]:
+    """Split a shared call's usage evenly (remainders to the first part)"""
+    shares = []
+    for i in range(parts):
+        share = new_usage()
+        for key in COUNT_KEYS:
+            share[key] = usage.get(key, 0) // parts + (1 if i < usage.get(key, 0) % parts else 0)
+        share["cost_usd"] = usage.get("cost_usd", 0.0) / parts
+        share["latency_seconds"] = usage.get("latency_seconds", 0.0) / parts
+        share["rounds"] = usage.get("rounds", [])
+        shares.append(share)
+    return shares
+
+
+class UsageTracker:
+    """Running usage totals per agent and per tenant"""
+
+    def __init__(self):
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_tenant: Dict[str, Dict[str, Any]] = {}
+        self.by_tenant_agent: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    @staticmethod
+    def _add(totals: Dict[str, Any], usage: Dict[str, Any]):
+        for key in COUNT_KEYS:
+            totals[key] = totals.get(key, 0) + usage.get(key, 0)
+        totals["cost_usd"] = totals.get("cost_usd", 0.0) + usage.get("cost_usd", 0.0)
+        totals["latency_seconds"] = totals.get("latency_seconds", 0.0) + usage.get("latency_seconds", 0.0)
+
+    def record_evaluation(
+        self,
+        agent_results: Dict[str, Dict[str, Any]],
+        tenant: Optional[str] = None
+    ):
+        """Add the usage of one evaluation's agent results to the running totals"""
+        tenant = tenant or "default"
+        tenant_totals = self.by_tenant.setdefault(tenant, {"evaluations": 0})
+        tenant_totals["evaluations"] += 1
+        for agent_name, result in agent_results.items():
+            usage = result.get("usage")
+            if not usage or result.get("shared"):
+                # Results reused within a batch were already counted once
+                continue
+            self._add(self.by_agent.setdefault(agent_name, {}), usage)
+            self._add(tenant_totals, usage)
+            self._add(self.by_tenant_agent.setdefault(tenant, {}).setdefault(agent_name, {}), usage)
+
+    def summary(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get running totals
+
+        Args:
+            tenant: Restrict to one tenant, broken down by agent
+        """
+        if tenant is not None:
+            return {
+                "tenant": tenant,
+                "total": dict(self.by_tenant.get(tenant, {"evaluations": 0})),
+                "agents": {
+                    name: dict(totals)
+                    for name, totals in self.by_tenant_agent.get(tenant, {}).items()
+                }
+            }
+        return {
+            "agents": {name: dict(totals) for name, totals in self.by_agent.items()},
+            "tenants": {name: dict(totals) for name, totals in self.by_tenant.items()}
+        }
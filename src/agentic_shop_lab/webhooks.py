@@ -0,0 +1,219 @@
+"""
+Signed webhook delivery with retries
+
+Each delivery is a JSON POST carrying the event ID, a Unix timestamp and, when
+a secret is configured, an HMAC-SHA256 signature over "<timestamp>.<body>".
+Receivers verify it with verify_signature and can use the event ID to ignore
+redelivered events.
+
+Callback URLs come from API callers, so they are checked before anything is
+sent: https only (unless disabled), and either a host on the configured
+allowlist or a host that resolves only to public addresses. Loopback,
+link-local (cloud metadata) and private networks are refused.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import random
+import socket
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+from urllib.parse import urlsplit
+
+
+EVENT_ID_HEADER = "X-ShopLab-Event-ID"
+TIMESTAMP_HEADER = "X-ShopLab-Timestamp"
+SIGNATURE_HEADER = "X-ShopLab-Signature"
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature header value for a webhook body"""
+    digest = hmac.new(secret.encode("utf-8"), timestamp.encode("utf-8") + b"." + body, hashlib.sha256)
+    return "sha256=" + digest.hexdigest()
+
+
+def verify_signature(
+    secret: str,
+    timestamp: str,
+    body: bytes,
+    signature: str,
+    tolerance: float = 300
+) -> bool:
+    """
+    Check a received webhook's signature and freshness
+
+    Args:
+        secret: Shared webhook secret
+        timestamp: Value of the timestamp header
+        body: Raw request body
+        signature: Value of the signature header
+        tolerance: Maximum age of the timestamp in seconds
+    """
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+
+class CallbackURLError(ValueError):
+    """A callback URL is not an allowed webhook target"""
+
+
+def host_allowed(host: str, allowed_hosts: Iterable[str]) -> bool:
+    """Match a host against an allowlist of names and "*.example.com" patterns"""
+    host = host.lower().rstrip(".")
+    for pattern in allowed_hosts:
+        pattern = pattern.lower().strip().rstrip(".")
+        if pattern.startswith("*."):
+            if host.endswith(pattern[1:]):
+                return True
+        elif host == pattern:
+            return True
+    return False
+
+
+async def check_callback_url(
+    url: str,
+    allowed_hosts: Iterable[str] = (),
+    require_https: bool = True
+):
+    """
+    Refuse callback URLs that could reach internal services
+
+    Hosts on the allowlist are trusted as configured. Without an allowlist,
+    every address the host resolves to must be globally routable.
+
+    Raises:
+        CallbackURLError: If the URL may not be used
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise CallbackURLError("Callback URL must be an absolute http(s) URL")
+    if require_https and parts.scheme != "https":
+        raise CallbackURLError("Callback URL must use https")
+
+    allowed_hosts = [h for h in allowed_hosts if h.strip()]
+    if allowed_hosts:
+        if not host_allowed(parts.hostname, allowed_hosts):
+            raise CallbackURLError(f"Callback host {parts.hostname} is not allowed")
+        return
+
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, port, type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise CallbackURLError(f"Callback host {parts.hostname} cannot be resolved: {e}")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            raise CallbackURLError(
+                f"Callback host {parts.hostname} resolves to a non-public address ({address})"
+            )
+
+
+class WebhookSender:
+    """
+    Delivers webhook events with exponential backoff.
+
+    Network errors, timeouts, 429 and 5xx responses are retried; any other
+    response ends the delivery. The URL is checked with check_callback_url
+    again before delivering, in case its DNS changed since submission.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 10.0,
+        allowed_hosts: Iterable[str] = (),
+        require_https: bool = True
+    ):
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.allowed_hosts = list(allowed_hosts)
+        self.require_https = require_https
+
+    async def check_url(self, url: str):
+        """Raise CallbackURLError unless url is an allowed target for this sender"""
+        await check_callback_url(url, self.allowed_hosts, self.require_https)
+
+    def _headers(self, event_id: str, body: bytes) -> Dict[str, str]:
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            EVENT_ID_HEADER: event_id,
+            TIMESTAMP_HEADER: timestamp,
+        }
+        if self.secret:
+            headers[SIGNATURE_HEADER] = sign_payload(self.secret, timestamp, body)
+        return headers
+
+    async def deliver(
+        self,
+        url: str,
+        event_id: str,
+        payload: Dict[str, Any],
+        delivery: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        POST an event to a URL until it is accepted or attempts run out
+
+        Args:
+            url: Callback URL
+            event_id: Stable ID for the event, the same on every attempt
+            payload: JSON-serializable event body
+            delivery: Optional record updated in place with the delivery state
+
+        Returns:
+            The delivery record (status, attempts, last_error, delivered_at)
+        """
+        import httpx
+
+        delivery = delivery if delivery is not None else {}
+        delivery.update({"url": url, "status": "pending", "attempts": 0, "last_error": None})
+        body = json.dumps(payload, default=str).encode("utf-8")
+
+        try:
+            await self.check_url(url)
+        except CallbackURLError as e:
+            delivery.update({"status": "failed", "last_error": str(e)})
+            return delivery
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            for attempt in range(1, self.max_attempts + 1):
+                delivery["attempts"] = attempt
+                try:
+                    # Headers are rebuilt per attempt so the timestamp stays fresh
+                    response = await client.post(url, content=body, headers=self._headers(event_id, body))
+                    if response.status_code < 300:
+                        delivery.update({
+                            "status": "delivered",
+                            "last_error": None,
+                            "delivered_at": datetime.now().isoformat()
+                        })
+                        return delivery
+                    delivery["last_error"] = f"HTTP {response.status_code}"
+                    if response.status_code != 429 and response.status_code < 500:
+                        break
+                except httpx.HTTPError as e:
+                    delivery["last_error"] = str(e) or type(e).__name__
+
+                if attempt < self.max_attempts:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        delivery["status"] = "failed"
+        return delivery
@@ -0,0 +1,85 @@
+"""
+Round trip of the offline batch mode against fixture files: export a catalog
+to batch requests, then import provider outputs for those requests.
+"""
+
+import json
+import os
+
+from agentic_shop_lab import AgenticShopLab
+from agentic_shop_lab.offline import (
+    OFFLINE_NOTE,
+    export_batch_requests,
+    import_batch_results,
+    split_custom_id,
+)
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "offline")
+CATALOG = os.path.join(FIXTURES, "catalog.jsonl")
+BATCH_OUTPUT = os.path.join(FIXTURES, "batch_output.jsonl")
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_export_writes_one_tool_free_request_per_product_and_agent(tmp_path):
+    framework = AgenticShopLab()
+    paths = export_batch_requests(CATALOG, str(tmp_path), framework)
+
+    requests = [r for path in paths for r in read_jsonl(path)]
+    expected_ids = {r["custom_id"] for r in read_jsonl(BATCH_OUTPUT)}
+    assert {r["custom_id"] for r in requests} == expected_ids
+    assert len(requests) == 2 * len(framework.agents)
+
+    for request in requests:
+        body = request["body"]
+        assert request["url"] == "/v1/chat/completions"
+        assert body["tool_choice"] == "none"
+        assert body["messages"][-1]["content"].endswith(OFFLINE_NOTE)
+
+
+def test_export_splits_files_at_the_request_limit(tmp_path):
+    paths = export_batch_requests(CATALOG, str(tmp_path), AgenticShopLab(), max_requests_per_file=3)
+
+    assert [len(read_jsonl(path)) for path in paths] == [3, 3, 2]
+
+
+def test_import_aggregates_batch_outputs(tmp_path):
+    framework = AgenticShopLab()
+    export_batch_requests(CATALOG, str(tmp_path / "requests"), framework)
+    results_path = tmp_path / "results.jsonl"
+
+    counts = import_batch_results(CATALOG, [BATCH_OUTPUT], str(results_path), framework)
+
+    assert counts == {"products": 2, "missing": 0}
+    peanut, energy = read_jsonl(results_path)
+
+    assert peanut["id"] == "pb-16"
+    assert peanut["result"]["overall_score"] == 80
+    assert peanut["result"]["overall_recommendation"] == "buy"
+    cost = peanut["result"]["agent_results"]["Cost Analysis"]
+    assert cost["source"] == "llm"
+    assert cost["usage"]["prompt_tokens"] == 900
+    assert cost["usage"]["cached_tokens"] == 512
+    assert peanut["result"]["usage"]["llm_calls"] == 4
+
+    # The failed request becomes an error result and is left out of the score
+    safety = energy["result"]["agent_results"]["Ingredient Safety"]
+    assert safety["recommendation"] == "error"
+    assert "server had an error" in safety["reasoning"]
+    assert energy["result"]["overall_score"] == (64 + 72 + 35) // 3
+
+
+def test_import_counts_missing_outputs(tmp_path):
+    partial = tmp_path / "partial_output.jsonl"
+    with open(partial, "w", encoding="utf-8") as f:
+        for line in read_jsonl(BATCH_OUTPUT):
+            if split_custom_id(line["custom_id"])[0] == 0:
+                f.write(json.dumps(line) + "\n")
+
+    counts = import_batch_results(CATALOG, [str(partial)], str(tmp_path / "results.jsonl"), AgenticShopLab())
+
+    assert counts == {"products": 2, "missing": 4}